@@ -1,3 +1,9 @@
+import heapq
+import multiprocessing
+import os
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait
 import data_structures as ds
 
 def binary_search_most(items, key_func):
@@ -7,6 +13,161 @@ def binary_search_most(items, key_func):
     return max(items, key=key_func)
 
 
+class _Reversed:
+    """Wraps a key so that it sorts the other way round (lets a min-heap act as a max-heap)"""
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __eq__(self, other):
+        # tuples compare element by element using ==, so equal keys must be equal here too
+        return self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+
+class StreamingTopK:
+    """
+    Keeps the k largest (or smallest) items seen so far in a heap of size k, so items
+    can be fed one at a time from any iterator without ever holding more than k of them.
+    O(log k) per item. Among equal keys the item seen first wins.
+    """
+    def __init__(self, k, key_func, largest=True):
+        self.k = k
+        self.key_func = key_func
+        self.largest = largest
+        self.heap = [] # (key, -position, item), the root is the item that goes first
+        self.seen = 0
+
+    def add(self, item):
+        key = self.key_func(item)
+        if not self.largest:
+            key = _Reversed(key)
+        entry = (key, -self.seen, item) # unique positions mean items are never compared
+        self.seen += 1
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif self.heap[0][:2] < entry[:2]:
+            heapq.heapreplace(self.heap, entry)
+
+    def extend(self, items):
+        for item in items:
+            self.add(item)
+
+    def result(self):
+        """The kept items, best first"""
+        return [entry[2] for entry in sorted(self.heap, key=lambda entry: entry[:2], reverse=True)]
+
+
+def _iterate(items):
+    """Iterator over any of our containers, without copying it"""
+    if isinstance(items, ds.BinaryTree):
+        return items.inorder_generator()
+    return iter(items)
+
+
+def nlargest(items, k, key_func):
+    """The k items with the largest keys, largest first. O(n log k) and streams over items"""
+    if k <= 0:
+        return []
+    top = StreamingTopK(k, key_func, largest=True)
+    top.extend(_iterate(items))
+    return top.result()
+
+
+def nsmallest(items, k, key_func):
+    """The k items with the smallest keys, smallest first. O(n log k) and streams over items"""
+    if k <= 0:
+        return []
+    top = StreamingTopK(k, key_func, largest=False)
+    top.extend(_iterate(items))
+    return top.result()
+
+
+def quickselect(items, k, key_func):
+    """
+    The item that would be at index k (0 based) if items were sorted by key_func,
+    without sorting them. Expected O(n). Keys are computed once and the input is not changed.
+    quickselect(items, len(items) // 2, key_func) gives the median.
+    """
+    items = list(_iterate(items))
+    if not 0 <= k < len(items):
+        raise IndexError("quickselect k out of range")
+    keys = [key_func(item) for item in items]
+    low, high = 0, len(items)
+    while high - low > 1:
+        pivot = keys[random.randrange(low, high)] # random pivot, no bad input for it
+
+        # 3-way partition: [low, lt) < pivot, [lt, gt) == pivot, [gt, high) > pivot
+        lt, i, gt = low, low, high
+        while i < gt:
+            key = keys[i]
+            if key < pivot:
+                _swap(keys, items, lt, i)
+                lt += 1
+                i += 1
+            elif pivot < key:
+                gt -= 1
+                _swap(keys, items, i, gt)
+            else:
+                i += 1
+
+        if k < lt:
+            high = lt
+        elif k >= gt:
+            low = gt
+        else:
+            return items[k] # k landed among the keys equal to the pivot
+    return items[low]
+
+
+def attribute_sort_value(item, attribute):
+    """
+    Value of an attribute ready for sorting: ticket tiers become their rank and numeric
+    strings (like ride durations) become ints.
+    """
+    if attribute == 'ticket_tier' and hasattr(item, 'get_sort_key'):
+        return item.get_sort_key('ticket_tier')
+    value = getattr(item, attribute)
+    if type(value) is str and value.isdigit():
+        return int(value)
+    return value
+
+
+def multi_key(specs):
+    """
+    Composite key function for sorting on several attributes, specs is a list of
+    (attribute, descending) pairs, most important first, e.g.
+    [('ticket_tier', True), ('age', False), ('name', False)].
+    Each part is normalized with attribute_sort_value; descending numbers are negated
+    and anything else is wrapped so it compares the other way round.
+    Pass the result as key_func to any of the sorts, they compute it once per item.
+    """
+    specs = [(attribute, bool(descending)) for attribute, descending in specs]
+    if not specs:
+        raise ValueError("multi_key needs at least one attribute.")
+
+    def composite_key(item):
+        parts = []
+        for attribute, descending in specs:
+            value = attribute_sort_value(item, attribute)
+            if descending:
+                value = -value if type(value) in (int, float) else _Reversed(value)
+            parts.append(value)
+        return tuple(parts)
+    return composite_key
+
+
+def multi_key_sort(items, specs, sort_func=None):
+    """Sort items on several attributes at once (see multi_key), stable with the default merge_sort"""
+    return (sort_func or merge_sort)(items, multi_key(specs))
+
+
 def binary_search_by_key(sorted_items, target_value, key_func):
     """Generic binary search to find an item by the target value using key_func"""
     left, right = 0, len(sorted_items) - 1
@@ -22,25 +183,215 @@ def binary_search_by_key(sorted_items, target_value, key_func):
     return -1
 
 
+def lower_bound(keys, target, low=0, high=None):
+    """Index of the first key >= target in sorted keys (len(keys) if there is none)"""
+    if high is None:
+        high = len(keys)
+    while low < high:
+        mid = (low + high) // 2
+        if keys[mid] < target:
+            low = mid + 1
+        else:
+            high = mid
+    return low
+
+
+def upper_bound(keys, target, low=0, high=None):
+    """Index of the first key > target in sorted keys (len(keys) if there is none)"""
+    if high is None:
+        high = len(keys)
+    while low < high:
+        mid = (low + high) // 2
+        if target < keys[mid]:
+            high = mid
+        else:
+            low = mid + 1
+    return low
+
+
+def equal_range(keys, target):
+    """(first, last) so that keys[first:last] are all the keys equal to target, empty if there are none"""
+    first = lower_bound(keys, target)
+    return first, upper_bound(keys, target, first)
+
+
+def batch_equal_range(keys, targets):
+    """
+    equal_range for many targets at once, returned in the order of targets.
+    The targets are sorted and resolved in one sweep over the keys. From the previous
+    position we gallop ahead (1, 2, 4, ... steps) and only binary search inside the last
+    step, so the whole batch costs O(m log m + m log(n / m)) instead of O(m log n),
+    and never more than one pass over the keys.
+    """
+    results = [None] * len(targets)
+    order = sorted(range(len(targets)), key=targets.__getitem__)
+    position = 0
+    for i in order:
+        target = targets[i]
+        first = _gallop(keys, target, position, lower=True)
+        last = _gallop(keys, target, first, lower=False)
+        results[i] = (first, last)
+        position = first
+    return results
+
+
+def _gallop(keys, target, start, lower):
+    """lower_bound (or upper_bound) of target, searching only from start onwards"""
+    size = len(keys)
+    before = (lambda key: key < target) if lower else (lambda key: not target < key)
+    if start >= size or not before(keys[start]):
+        return start
+    step = 1
+    previous = start
+    while start + step < size and before(keys[start + step]):
+        previous = start + step
+        step *= 2
+    high = min(start + step, size)
+    if lower:
+        return lower_bound(keys, target, previous + 1, high)
+    return upper_bound(keys, target, previous + 1, high)
+
+
+INSERTION_SORT_THRESHOLD = 16 # ranges this small are finished off with insertion sort
+
+
 def quicksort(items, key_func):
-    """Generic quicksort using key function"""
-    if len(items) <= 1:
-        return items
-    
-    pivot = items[len(items) // 2]
-    pivot_value = key_func(pivot)
-    
-    left = [x for x in items if key_func(x) < pivot_value]
-    middle = [x for x in items if key_func(x) == pivot_value]
-    right = [x for x in items if key_func(x) > pivot_value]
-    
-    return quicksort(left, key_func) + middle + quicksort(right, key_func)
+    """
+    Generic in-place introsort using key function.
+    Every key is computed exactly once (decorate-sort-undecorate) and the keys are
+    swapped alongside the items. Median of three pivot, 3-way partition (so runs of
+    duplicates are done in one pass), heapsort if the recursion gets too deep and
+    insertion sort for small ranges.
+    A DynamicArray or list is sorted in place and returned, any other container
+    is copied into a list first.
+    """
+    if isinstance(items, ds.DynamicArray):
+        storage, size = items.array, items.size # sort the backing array directly, no get_all() copy
+    else:
+        if isinstance(items, ds.BinaryTree):
+            items = list(items.inorder_generator())
+        elif not isinstance(items, list):
+            items = items.get_all() if hasattr(items, 'get_all') else list(items)
+        storage, size = items, len(items)
+
+    keys = [key_func(storage[i]) for i in range(size)]
+    _introsort(keys, storage, 0, size, 2 * size.bit_length())
+    return items
+
+
+def _swap(keys, items, i, j):
+    keys[i], keys[j] = keys[j], keys[i]
+    items[i], items[j] = items[j], items[i]
+
+
+def _introsort(keys, items, low, high, depth_limit):
+    """Sort keys[low:high] and items[low:high] together (high is exclusive)"""
+    while high - low > INSERTION_SORT_THRESHOLD:
+        if depth_limit == 0:
+            _heapsort(keys, items, low, high)
+            return
+        depth_limit -= 1
+
+        # median of three, moved to the front to act as the pivot
+        mid = (low + high) // 2
+        first, last = low, high - 1
+        if keys[mid] < keys[first]:
+            first, mid = mid, first
+        if keys[last] < keys[mid]:
+            mid = first if keys[last] < keys[first] else last
+        _swap(keys, items, low, mid)
+        pivot = keys[low]
+
+        # Bentley-McIlroy 3-way partition: keys equal to the pivot are parked at both ends
+        # while scanning and swapped into the middle afterwards. Sorted input needs no swaps
+        # and runs of duplicates end up in the middle, where they are never looked at again.
+        last = high - 1
+        i, j = low, high
+        p, q = low, high
+        while True:
+            i += 1
+            while keys[i] < pivot and i != last:
+                i += 1
+            j -= 1
+            while pivot < keys[j] and j != low:
+                j -= 1
+            if i == j and keys[i] == pivot:
+                p += 1
+                _swap(keys, items, p, i)
+            if i >= j:
+                break
+            _swap(keys, items, i, j)
+            if keys[i] == pivot:
+                p += 1
+                _swap(keys, items, p, i)
+            if keys[j] == pivot:
+                q -= 1
+                _swap(keys, items, q, j)
+
+        i = j + 1
+        for k in range(low, p + 1):
+            _swap(keys, items, k, j)
+            j -= 1
+        for k in range(last, q - 1, -1):
+            _swap(keys, items, k, i)
+            i += 1
+        lt, gt = j + 1, i # now [low, lt) < pivot, [lt, gt) == pivot, [gt, high) > pivot
+
+        # recurse into the smaller side and loop on the bigger one, so the stack stays O(log n)
+        if lt - low < high - gt:
+            _introsort(keys, items, low, lt, depth_limit)
+            low = gt
+        else:
+            _introsort(keys, items, gt, high, depth_limit)
+            high = lt
+
+    _insertion_sort(keys, items, low, high)
+
+
+def _insertion_sort(keys, items, low, high):
+    for i in range(low + 1, high):
+        key, item = keys[i], items[i]
+        j = i - 1
+        while j >= low and key < keys[j]:
+            keys[j + 1] = keys[j]
+            items[j + 1] = items[j]
+            j -= 1
+        keys[j + 1] = key
+        items[j + 1] = item
+
 
+def _heapsort(keys, items, low, high):
+    size = high - low
+    for start in range(size // 2 - 1, -1, -1):
+        _sift_down(keys, items, low, start, size)
+    for end in range(size - 1, 0, -1):
+        _swap(keys, items, low, low + end)
+        _sift_down(keys, items, low, 0, end)
 
 
-def linear_search(items, target_value, key_func):
-    """Generic linear search to find items by attribute using key_func"""
+def _sift_down(keys, items, offset, root, size):
+    """Max-heap sift down inside keys[offset:offset + size]"""
+    while True:
+        child = 2 * root + 1
+        if child >= size:
+            return
+        if child + 1 < size and keys[offset + child] < keys[offset + child + 1]:
+            child += 1
+        if keys[offset + root] < keys[offset + child]:
+            _swap(keys, items, offset + root, offset + child)
+            root = child
+        else:
+            return
+
+
+def linear_search(items, target_value, key_func, limit=None):
+    """
+    Generic linear search to find items by attribute using key_func.
+    Stops early once limit items are found. For searches on several attributes
+    or with comparisons see query.search.
+    """
     results = []
+    target = str(target_value).lower() # normalized once, not for every item
     
     # If collection has a 'get_all' method, use it
     if hasattr(items, 'get_all'):
@@ -49,21 +400,35 @@ def linear_search(items, target_value, key_func):
         items = items.get_all_restaurants()
     
     for item in items:
-        if item and str(key_func(item)).lower() == str(target_value).lower():
+        if item is not None and str(key_func(item)).lower() == target:
             results.append(item)
+            if len(results) == limit:
+                break
     
     return results
 
+def range_search(items, low, high, key_func):
+    """Find all items with low <= key <= high, items can be a prebuilt SortedIndex"""
+    if not isinstance(items, ds.SortedIndex):
+        items = ds.SortedIndex(items, key_func)
+    return items.range_search(low, high)
+
+def prefix_search(items, prefix, key_func):
+    """Find all items whose key starts with prefix, items can be a prebuilt SortedIndex"""
+    if not isinstance(items, ds.SortedIndex):
+        items = ds.SortedIndex(items, lambda x: str(key_func(x)))
+    return items.prefix_search(str(prefix))
+
 def bfs_search(root, target):
     if isinstance(root, ds.BinaryTree):
         root = root.root
     if not root:
         return None
 
-    queue = [root]
+    queue = deque([root]) # popping from the front of a list is O(n), a deque is O(1)
 
     while queue:
-        node = queue.pop(0)  # take the first item (like a queue)
+        node = queue.popleft()
         if node.data == target:
             return node
         if node.left:
@@ -78,48 +443,362 @@ def dfs_search(root, target):
         root = root.root
     if not root:
         return None
-    if root.data == target:
-        return root
 
-    found = dfs_search(root.left, target)
-    if found:
-        return found
+    stack = [root] # explicit stack instead of recursion, deep trees would hit the recursion limit
+    while stack:
+        node = stack.pop()
+        if node.data == target:
+            return node
+        if node.right:
+            stack.append(node.right)
+        if node.left:
+            stack.append(node.left) # left is searched first, like the recursive version
 
-    return dfs_search(root.right, target)
+    return None
 
 def bst_search(tree, target):
     return tree.search(target)
 
 def merge_sort(items, key_func):
-    """Generic merge sort using key function"""
-    if hasattr(items, 'get_all_restaurants'):
-        items = items.get_all_restaurants()
-    elif hasattr(items, 'get_all'):
-        items = items.get_all()
-    
-    if len(items) <= 1:
+    """
+    Generic stable merge sort using key function.
+    Linked lists are sorted in place by relinking their nodes, see linked_list_merge_sort.
+    Everything else goes through a bottom-up merge sort with precomputed keys that merges
+    back and forth between the storage itself and one scratch buffer (for the items and
+    their keys); a DynamicArray or list is sorted in place and returned, any other
+    container is copied into a list first.
+    """
+    if isinstance(items, ds.SinglyLinkedList):
+        return linked_list_merge_sort(items, key_func)
+
+    if isinstance(items, ds.DynamicArray):
+        storage, size = items.array, items.size
+    else:
+        if hasattr(items, 'get_all_restaurants'):
+            items = items.get_all_restaurants()
+        elif isinstance(items, ds.BinaryTree):
+            items = list(items.inorder_generator())
+        elif not isinstance(items, list):
+            items = items.get_all() if hasattr(items, 'get_all') else list(items)
+        storage, size = items, len(items)
+
+    if size <= 1:
         return items
-    
-    mid = len(items) // 2
-    left = merge_sort(items[:mid], key_func)
-    right = merge_sort(items[mid:], key_func)
-    
-    return merge(left, right, key_func)
 
-def merge(left, right, key_func):
-    """Helper merge function"""
-    result = []
-    i = j = 0
-    
-    while i < len(left) and j < len(right):
-        if key_func(left[i]) <= key_func(right[j]):
-            result.append(left[i])
+    keys = [key_func(storage[i]) for i in range(size)]
+    source_keys, source_items = keys, storage
+    target_keys, target_items = [None] * size, [None] * size # the scratch buffer
+
+    # merge runs of width 1, 2, 4, ... back and forth between the storage and the scratch buffer
+    width = 1
+    while width < size:
+        for low in range(0, size, 2 * width):
+            mid = min(low + width, size)
+            high = min(low + 2 * width, size)
+            merge_runs(source_keys, source_items, target_keys, target_items, low, mid, high)
+        source_keys, target_keys = target_keys, source_keys
+        source_items, target_items = target_items, source_items
+        width *= 2
+
+    if source_items is not storage: # an odd number of passes ends in the scratch buffer
+        storage[:size] = source_items
+    return items
+
+def merge_runs(keys, items, out_keys, out_items, low, mid, high):
+    """Helper merge function: merges [low, mid) and [mid, high) of keys/items into out_keys/out_items"""
+    i, j = low, mid
+    for k in range(low, high):
+        # take from the right run only if strictly smaller, that keeps the sort stable
+        if j < high and (i >= mid or keys[j] < keys[i]):
+            out_keys[k] = keys[j]
+            out_items[k] = items[j]
+            j += 1
+        else:
+            out_keys[k] = keys[i]
+            out_items[k] = items[i]
             i += 1
+
+def linked_list_merge_sort(linked_list, key_func):
+    """
+    Stable bottom-up merge sort of a SinglyLinkedList or DoublyLinkedList.
+    Only the next (and prev) pointers are changed, so no items are copied and the
+    extra memory is O(1). Keys are computed only for the current head of each run,
+    so once per node per pass instead of twice per comparison.
+    """
+    if linked_list.count < 2:
+        return linked_list
+
+    dummy = ds.SinglyListNode(None)
+    dummy.next = linked_list.head
+    width = 1
+    while width < linked_list.count:
+        tail = dummy
+        current = dummy.next
+        while current:
+            left = current
+            right = _split_run(left, width)
+            current = _split_run(right, width)
+            tail = _merge_linked_runs(left, right, tail, key_func)
+        width *= 2
+
+    linked_list.head = dummy.next
+    linked_list.tail = tail
+    if isinstance(linked_list, ds.DoublyLinkedList):
+        previous = None
+        current = linked_list.head
+        while current:
+            current.prev = previous
+            previous = current
+            current = current.next
+    linked_list.reindex()
+    return linked_list
+
+def _split_run(head, width):
+    """Cut the list after width nodes, returns the node after the cut (or None)"""
+    for _ in range(width - 1):
+        if head is None:
+            return None
+        head = head.next
+    if head is None:
+        return None
+    rest = head.next
+    head.next = None
+    return rest
+
+def _merge_linked_runs(left, right, tail, key_func):
+    """Merge two runs and hang the result after tail, returns the new tail"""
+    left_key = key_func(left.data) if left else None
+    right_key = key_func(right.data) if right else None
+    while left and right:
+        if right_key < left_key:
+            tail.next = right
+            tail = right
+            right = right.next
+            if right:
+                right_key = key_func(right.data)
         else:
-            result.append(right[j])
-            j += 1
-    
-    result.extend(left[i:])
-    result.extend(right[j:])
-    
-    return result
+            tail.next = left
+            tail = left
+            left = left.next
+            if left:
+                left_key = key_func(left.data)
+    tail.next = left or right
+    while tail.next:
+        tail = tail.next
+    return tail
+
+COUNTING_SORT_MAX_RANGE = 1 << 16 # int keys spanning at most this many values (or n) are counting sorted
+COUNTING_SORT_MAX_DISTINCT = 1024 # other keys with at most this many distinct values are counting sorted
+
+
+def counting_sort(items, key_func):
+    """
+    Stable counting sort, linear time for keys with few distinct values (tiers, ages, ...).
+    Int keys are counted in a list indexed by key - min, anything else hashable in a dict
+    whose distinct keys are sorted once. Sorts in place where possible, like merge_sort.
+    """
+    return _sort_by_order(items, key_func, _counting_order)
+
+
+def radix_sort(items, key_func):
+    """
+    Stable LSD radix sort for int keys (ids), one bucket pass per byte of the key range,
+    so O(n * bytes). Sorts in place where possible, like merge_sort.
+    """
+    return _sort_by_order(items, key_func, _radix_order)
+
+
+def auto_sort(items, key_func):
+    """
+    Picks a sort from the keys: counting sort for ints with a small range or keys with few
+    distinct values, radix sort for other ints and merge sort for everything else.
+    Keys are computed only once whichever sort is picked.
+    """
+    return _sort_by_order(items, key_func, _choose_order)
+
+
+def _sort_by_order(items, key_func, order_func):
+    """Compute keys once, let order_func turn them into a sorted permutation and apply it"""
+    if isinstance(items, ds.SinglyLinkedList):
+        nodes = _linked_list_nodes(items)
+        if len(nodes) > 1:
+            order = order_func([key_func(node.data) for node in nodes])
+            _relink_in_order(items, [nodes[i] for i in order])
+        return items
+
+    if isinstance(items, ds.DynamicArray):
+        storage, size = items.array, items.size
+    else:
+        if isinstance(items, ds.BinaryTree):
+            items = list(items.inorder_generator())
+        elif not isinstance(items, list):
+            items = items.get_all() if hasattr(items, 'get_all') else list(items)
+        storage, size = items, len(items)
+    if size > 1:
+        order = order_func([key_func(storage[i]) for i in range(size)])
+        storage[:size] = [storage[i] for i in order]
+    return items
+
+def _all_ints(keys):
+    return all(type(key) is int for key in keys) # not isinstance, bools aren't sort keys
+
+def _counting_order(keys):
+    order = [0] * len(keys)
+    if _all_ints(keys) and max(keys) - min(keys) <= max(COUNTING_SORT_MAX_RANGE, len(keys)):
+        smallest = min(keys)
+        counts = [0] * (max(keys) - smallest + 2)
+        for key in keys:
+            counts[key - smallest + 1] += 1
+        for i in range(1, len(counts)): # counts[v] becomes the first slot for value v
+            counts[i] += counts[i - 1]
+        for i, key in enumerate(keys):
+            order[counts[key - smallest]] = i
+            counts[key - smallest] += 1
+        return order
+
+    # wide int ranges and other keys are counted in a dict instead
+    counts = {}
+    for key in keys:
+        counts[key] = counts.get(key, 0) + 1
+    starts = {}
+    total = 0
+    for key in sorted(counts):
+        starts[key] = total
+        total += counts[key]
+    for i, key in enumerate(keys):
+        order[starts[key]] = i
+        starts[key] += 1
+    return order
+
+def _radix_order(keys):
+    if not _all_ints(keys):
+        raise TypeError("radix_sort needs int keys.")
+    smallest = min(keys)
+    values = [key - smallest for key in keys] # shift so negative keys work too
+    largest = max(values)
+    order = list(range(len(keys)))
+    shift = 0
+    while (largest >> shift) > 0:
+        buckets = [[] for _ in range(256)]
+        for i in order:
+            buckets[(values[i] >> shift) & 0xFF].append(i)
+        order = [i for bucket in buckets for i in bucket]
+        shift += 8
+    return order
+
+def _choose_order(keys):
+    if _all_ints(keys):
+        if max(keys) - min(keys) <= max(COUNTING_SORT_MAX_RANGE, len(keys)):
+            return _counting_order(keys)
+        return _radix_order(keys)
+
+    distinct = set()
+    try:
+        for key in keys:
+            distinct.add(key)
+            if len(distinct) > COUNTING_SORT_MAX_DISTINCT:
+                break
+    except TypeError:
+        distinct = None # unhashable keys, can't be counted
+    if distinct is not None and len(distinct) <= COUNTING_SORT_MAX_DISTINCT:
+        return _counting_order(keys)
+    return merge_sort(list(range(len(keys))), keys.__getitem__)
+
+
+PARALLEL_SORT_THRESHOLD = 100000 # below this many items a process pool costs more than it saves
+PARALLEL_SORT_WORKERS = None # None means one worker per cpu core
+PARALLEL_SORT_POLL_SECONDS = 0.1 # how often progress is called while the chunks are sorted
+
+# worker processes are started from a fresh server process (or spawned where there is none),
+# forking a process that runs other threads (like the GUI) can leave their locks held in the child
+POOL_CONTEXT = multiprocessing.get_context("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+
+def parallel_sort(items, key_func, workers=None, progress=None):
+    """
+    Stable multi-core sort. The keys are extracted once in this process, split into one
+    chunk per worker and each chunk is merge sorted in a separate process, so only the
+    keys are pickled, never the model objects. The sorted chunks are then k-way merged.
+    Small inputs (or a single worker) just use merge_sort.
+    Like merge_sort, containers are sorted in place where possible and returned.
+    progress(chunks sorted) is called every PARALLEL_SORT_POLL_SECONDS while the chunks are
+    sorted and once more before items are reordered. Raising from it stops the sort and
+    leaves items as they were (small inputs are sorted at once, without calling it).
+    """
+    workers = workers or PARALLEL_SORT_WORKERS or os.cpu_count() or 1
+    size = len(items) if hasattr(items, '__len__') else None
+    if size is None or size < PARALLEL_SORT_THRESHOLD or (workers <= 1 and progress is None):
+        return merge_sort(items, key_func)
+
+    if isinstance(items, ds.SinglyLinkedList):
+        storage = _linked_list_nodes(items)
+        keys = [key_func(node.data) for node in storage]
+    else:
+        if isinstance(items, ds.DynamicArray):
+            storage = items.array
+        else:
+            storage = items if isinstance(items, list) else (items.get_all() if hasattr(items, 'get_all') else list(items))
+            items = storage
+        keys = [key_func(storage[i]) for i in range(size)]
+
+    if workers > 1:
+        order = _sort_chunks(keys, workers, progress)
+    else:
+        order = _sort_chunk(keys) # sorted here, but it can still be stopped before items change
+        if progress:
+            progress(1)
+
+    if isinstance(items, ds.SinglyLinkedList):
+        _relink_in_order(items, [storage[i] for i in order])
+    else:
+        storage[:size] = [storage[i] for i in order]
+    return items
+
+def _sort_chunks(keys, workers, progress):
+    """Positions of keys in sorted order, the chunks sorted by a pool of worker processes"""
+    chunk_size = -(-len(keys) // workers) # ceiling division
+    starts = range(0, len(keys), chunk_size)
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=POOL_CONTEXT)
+    try:
+        futures = [pool.submit(_sort_chunk, keys[start:start + chunk_size]) for start in starts]
+        pending = futures
+        while pending:
+            pending = wait(pending, timeout=PARALLEL_SORT_POLL_SECONDS).not_done
+            if progress:
+                progress(len(futures) - len(pending))
+        # turn the chunk positions back into positions in the whole list
+        runs = [[start + i for i in future.result()] for start, future in zip(starts, futures)]
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True) # when stopped, chunks being sorted finish on their own
+
+    # heapq.merge prefers earlier runs on equal keys, so the result stays stable
+    order = list(heapq.merge(*runs, key=keys.__getitem__))
+    if progress:
+        progress(len(futures))
+    return order
+
+def _sort_chunk(keys):
+    """Runs in a worker process: returns the positions of keys in sorted order"""
+    return merge_sort(list(range(len(keys))), keys.__getitem__)
+
+def _linked_list_nodes(linked_list):
+    nodes = []
+    current = linked_list.head
+    while current:
+        nodes.append(current)
+        current = current.next
+    return nodes
+
+def _relink_in_order(linked_list, nodes):
+    """Link the given nodes of a linked list up again in the given order"""
+    previous = None
+    for node in nodes:
+        if previous:
+            previous.next = node
+        if isinstance(node, ds.DoublyListNode):
+            node.prev = previous
+        previous = node
+    previous.next = None
+    linked_list.head = nodes[0]
+    linked_list.tail = previous
+    linked_list.reindex()
@@ -0,0 +1,228 @@
+import sys
+from array import array
+import schemas
+from models import Customer, Ride, Restaurant, tier_order
+
+"""
+Column oriented storage for the models, one typed array per attribute instead of one
+python object per row. Sorting and searching then work on plain ints and strings and
+the model objects are only created again when a row is actually asked for.
+"""
+
+# column kinds:
+#   int      -> array of 64-bit ints
+#   category -> array of small int codes + list of the distinct values
+#   str      -> list of interned strings (equal names share one object)
+#   object   -> plain list, for anything else (restaurant types)
+SCHEMAS = {
+    Customer: [("customer_id", "int"), ("name", "str"), ("age", "int"), ("gender", "category"), ("ticket_tier", "category")],
+    Ride: [("ride_id", "int"), ("name", "str"), ("location", "str"), ("duration", "int"), ("ticket_tier", "category")],
+    Restaurant: [("restaurant_id", "int"), ("name", "str"), ("location", "str"), ("type", "object")],
+}
+
+# values that have to be turned back into their original type when a row is materialized
+# (durations come out of the csv as strings)
+OUTPUT_CONVERTERS = {
+    (Ride, "duration"): str,
+    (Restaurant, "type"): list,
+}
+
+# columnar kinds of the schema registry's column kinds, for models without a schema above
+REGISTRY_KINDS = {"int": "int", "str": "str", "tier": "category"}
+
+
+def schema_of(model_class):
+    """Columnar schema of a model: the hand tuned one above, or one worked out from its registered schema."""
+    if model_class in SCHEMAS:
+        return SCHEMAS[model_class]
+    if model_class not in schemas.REGISTRY:
+        return None
+    return [(column.name, REGISTRY_KINDS.get(column.kind, "object") if isinstance(column.kind, str) else "object")
+            for column in schemas.REGISTRY[model_class]]
+
+
+def tier_columns(model_class):
+    """Names of the columns holding tiers, their codes follow tier_order."""
+    return {column.name for column in schemas.REGISTRY.get(model_class, []) if column.kind == "tier"}
+
+
+class CategoryColumn:
+    """
+    Stores each value as a code into a table of distinct values.
+    If ordered_values is given the codes follow that order (used for ticket_tier),
+    otherwise codes are handed out as new values show up.
+    """
+    def __init__(self, ordered_values=None):
+        self.values = list(ordered_values) if ordered_values else []
+        self.ordered = ordered_values is not None
+        self.lookup = {value: code for code, value in enumerate(self.values)}
+        self.codes = array("h")
+        self._ranks = None
+
+    def append(self, value):
+        code = self.lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.lookup[value] = code
+            self._ranks = None
+        self.codes.append(code)
+
+    def code_of(self, value):
+        """Code of a value, or -1 if it never occurs (so it can't match anything)."""
+        return self.lookup.get(value, -1)
+
+    def ranks(self):
+        """Sort rank for every code, so sorting the codes sorts the values."""
+        if self.ordered:
+            return list(range(len(self.values)))
+        if self._ranks is None:
+            order = sorted(range(len(self.values)), key=self.values.__getitem__)
+            self._ranks = [0] * len(self.values)
+            for rank, code in enumerate(order):
+                self._ranks[code] = rank
+        return self._ranks
+
+    def __getitem__(self, index):
+        return self.values[self.codes[index]]
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class ColumnarDataset:
+    """Columnar container for the rows of any registered model."""
+    def __init__(self, model_class):
+        self.schema = schema_of(model_class)
+        if self.schema is None:
+            raise ValueError(f"No columnar schema for {model_class.__name__}.")
+        self.model_class = model_class
+        tiers = tier_columns(model_class)
+        self.columns = {}
+        for name, kind in self.schema:
+            if kind == "int":
+                self.columns[name] = array("q")
+            elif kind == "category":
+                self.columns[name] = CategoryColumn(tier_order if name in tiers else None)
+            else:
+                self.columns[name] = []
+        self.size = 0
+
+    @classmethod
+    def from_objects(cls, objects, model_class=None):
+        """Build a dataset from model objects (a list or any of our containers)."""
+        objects = iter(objects)
+        if model_class is None:
+            first = next(objects, None)
+            if first is None:
+                raise ValueError("Can't work out the model class of an empty dataset.")
+            dataset = cls(type(first))
+            dataset.append(first)
+        else:
+            dataset = cls(model_class)
+        for obj in objects:
+            dataset.append(obj)
+        return dataset
+
+    def append(self, obj):
+        for name, kind in self.schema:
+            value = getattr(obj, name)
+            if kind == "int":
+                value = int(value) # raises ValueError for ids like "C1", these can't go in an int column
+            elif kind == "str":
+                value = sys.intern(value)
+            self.columns[name].append(value)
+        self.size += 1
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield self.materialize(i)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.size
+        if 0 <= index < self.size:
+            return self.materialize(index)
+        return None
+
+    def get_size(self):
+        return self.size
+
+    def get_all(self):
+        return list(self)
+
+    def materialize(self, index):
+        """Create the model object for one row."""
+        values = []
+        for name, _ in self.schema:
+            value = self.columns[name][index]
+            converter = OUTPUT_CONVERTERS.get((self.model_class, name))
+            values.append(converter(value) if converter else value)
+        return self.model_class(*values)
+
+    def column(self, name):
+        """Raw column: an array for ints, CategoryColumn for categories, list otherwise."""
+        if name not in self.columns:
+            raise AttributeError(f"Attribute '{name}' not found in {self.model_class.__name__} columns.")
+        return self.columns[name]
+
+    def sort_keys(self, name):
+        """Per row sort keys for a column (category codes are mapped to their rank)."""
+        column = self.column(name)
+        if isinstance(column, CategoryColumn):
+            ranks = column.ranks()
+            return [ranks[code] for code in column.codes]
+        return column
+
+    def argsort(self, name, reverse=False):
+        """Row indexes in sorted order of a column. Stable, the key lookups all run in C."""
+        keys = self.sort_keys(name)
+        return sorted(range(self.size), key=keys.__getitem__, reverse=reverse)
+
+    def take(self, indexes):
+        """New dataset holding the given rows, in the given order."""
+        result = ColumnarDataset(self.model_class)
+        for name, kind in self.schema:
+            column = self.columns[name]
+            if kind == "category":
+                new_column = result.columns[name]
+                new_column.values = list(column.values)
+                new_column.lookup = dict(column.lookup)
+                new_column.codes = array("h", [column.codes[i] for i in indexes])
+            elif kind == "int":
+                result.columns[name] = array("q", [column[i] for i in indexes])
+            else:
+                result.columns[name] = [column[i] for i in indexes]
+        result.size = len(indexes)
+        return result
+
+    def sort(self, name, reverse=False):
+        """New dataset sorted by a column."""
+        return self.take(self.argsort(name, reverse))
+
+    def where(self, name, value):
+        """Indexes of all rows where the column equals value."""
+        column = self.column(name)
+        if isinstance(column, CategoryColumn):
+            target = column.code_of(value) # compare codes instead of strings
+            values = column.codes
+        else:
+            target = int(value) if isinstance(column, array) else value
+            values = column
+        return [i for i, v in enumerate(values) if v == target]
+
+    def filter(self, name, predicate):
+        """Indexes of all rows where predicate(value) is true."""
+        column = self.column(name)
+        if isinstance(column, CategoryColumn):
+            # only run the predicate once per distinct value
+            matching = {code for code, value in enumerate(column.values) if predicate(value)}
+            return [i for i, code in enumerate(column.codes) if code in matching]
+        return [i for i, v in enumerate(column) if predicate(v)]
+
+    def search(self, name, value):
+        """Model objects of all rows where the column equals value."""
+        return [self.materialize(i) for i in self.where(name, value)]
@@ -1,3 +1,14 @@
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+def index_key(value):
+    """Hashable form of an attribute value for the secondary indexes (lists become tuples)"""
+    if isinstance(value, list):
+        return tuple(value)
+    hash(value) # raises TypeError for anything else we can't index
+    return value
+
+
 # Singly Linked List Node
 class SinglyListNode:
     def __init__(self, data):
@@ -15,7 +26,18 @@ class DoublyListNode:
 class SinglyLinkedList:
     def __init__(self):
         self.head = None
+        self.tail = None
         self.count = 0
+        # optional secondary indexes: attribute name -> {value -> {node: None}}
+        # the inner dicts keep the nodes in insertion order and allow O(1) deletes
+        self.indexes = {}
+
+    @classmethod
+    def from_iterable(cls, items):
+        """Build a new list from any iterable in linear time."""
+        new_list = cls()
+        new_list.extend(items)
+        return new_list
 
     def __iter__(self):
         # much easier to trasverse the list using a generator
@@ -38,16 +60,77 @@ class SinglyLinkedList:
 
     def add(self, item):
         new_node = SinglyListNode(item)
+        self._index_node(new_node) # first, so an unindexable item leaves the list untouched
         if not self.head:
             self.head = new_node
         else:
-            current = self.head
-            while current.next:
-                current = current.next
-            current.next = new_node
+            self.tail.next = new_node # keeping a tail pointer makes appending O(1)
+        self.tail = new_node
         self.count += 1
 
+    def extend(self, items):
+        """Append every item of an iterable, linking the nodes in one pass."""
+        for item in items:
+            self.add(item)
+
+    # Secondary indexes
+
+    def create_index(self, attribute_name):
+        """
+        Start keeping a hash index on an attribute, so lookups and removals by it are O(1).
+        The index is kept up to date by add and remove_by_attribute, but not if the
+        attribute is changed on an object that is already in the list.
+        List values (like Restaurant.type) are indexed as tuples, lookups accept either.
+        Raises TypeError if a value can't be indexed, the list is left without the index then.
+        """
+        index = {}
+        current = self.head
+        while current:
+            if hasattr(current.data, attribute_name):
+                index.setdefault(index_key(getattr(current.data, attribute_name)), {})[current] = None
+            current = current.next
+        self.indexes[attribute_name] = index
+
+    def drop_index(self, attribute_name):
+        self.indexes.pop(attribute_name, None)
+
+    def reindex(self):
+        """
+        Rebuild the indexes in list order, needed after the nodes were relinked in a new order
+        (the in place sorts do this), so indexed lookups keep returning the first match in the list.
+        """
+        for attribute_name in list(self.indexes):
+            self.create_index(attribute_name)
+
+    def _index_node(self, node):
+        # work out every key before touching any index, so a failure changes nothing
+        keys = [(index, index_key(getattr(node.data, attribute_name)))
+                for attribute_name, index in self.indexes.items() if hasattr(node.data, attribute_name)]
+        for index, key in keys:
+            index.setdefault(key, {})[node] = None
+
+    def _unindex_node(self, node):
+        for attribute_name, index in self.indexes.items():
+            if hasattr(node.data, attribute_name):
+                value = index_key(getattr(node.data, attribute_name))
+                bucket = index.get(value)
+                if bucket is not None:
+                    bucket.pop(node, None)
+                    if not bucket:
+                        del index[value]
+
+    def _first_indexed_node(self, attribute_name, value):
+        """First node holding value according to the index, None if there is none."""
+        bucket = self.indexes[attribute_name].get(index_key(value))
+        if not bucket:
+            return None
+        return next(iter(bucket))
+
     def get_by_attribute(self, attribute_name, value):
+        if attribute_name in self.indexes:
+            node = self._first_indexed_node(attribute_name, value)
+            return node.data if node else None
+
         current = self.head
         while current:
             if hasattr(current.data, attribute_name) and getattr(current.data, attribute_name) == value:
@@ -55,31 +138,56 @@ class SinglyLinkedList:
             current = current.next
         return None
 
+    def get_all_by_attribute(self, attribute_name, value):
+        """Return every item whose attribute equals value, in list order."""
+        if attribute_name in self.indexes:
+            return [node.data for node in self.indexes[attribute_name].get(index_key(value), ())]
+        return [item for item in self if hasattr(item, attribute_name) and getattr(item, attribute_name) == value]
+
     def remove_by_attribute(self, attribute_name, value):
         if not self.head:
             return False  # Empty list
+
+        if attribute_name in self.indexes:
+            target = self._first_indexed_node(attribute_name, value)
+            if target is None:
+                return False
+            # a singly linked node doesn't know its predecessor, so we still have to walk to it,
+            # but only comparing node identities
+            previous = None
+            current = self.head
+            while current is not target:
+                previous = current
+                current = current.next
+            self._unlink(previous, target)
+            return True
         
         # Check the head node first
         if hasattr(self.head.data, attribute_name) and getattr(self.head.data, attribute_name) == value:
-            self.head = self.head.next
-            self.count -= 1
-            if not self.head:
-                self.tail = None  # If the list is now empty
+            self._unlink(None, self.head)
             return True
         
         # Traverse the list to find the node to remove
         current = self.head
         while current and current.next:
             if hasattr(current.next.data, attribute_name) and getattr(current.next.data, attribute_name) == value:
-                current.next = current.next.next
-                self.count -= 1
-                if not current.next:  # If we removed the tail
-                    self.tail = current
+                self._unlink(current, current.next)
                 return True
             current = current.next
         
         return False  # Node with the specified attribute and value not found
 
+    def _unlink(self, previous, node):
+        """Remove node from the list, previous is the node before it (None for the head)."""
+        if previous is None:
+            self.head = node.next
+        else:
+            previous.next = node.next
+        if node is self.tail:
+            self.tail = previous # If we removed the tail (None if the list is now empty)
+        self.count -= 1
+        self._unindex_node(node)
+
     def get_all(self):
         items = []
         current = self.head
@@ -95,10 +203,10 @@ class SinglyLinkedList:
 class DoublyLinkedList(SinglyLinkedList):
     def __init__(self):
         super().__init__()
-        self.tail = None
 
     def add(self, item):
         new_node = DoublyListNode(item)
+        self._index_node(new_node) # first, so an unindexable item leaves the list untouched
         if not self.head:
             self.head = new_node
             self.tail = new_node
@@ -111,28 +219,34 @@ class DoublyLinkedList(SinglyLinkedList):
     def remove_by_attribute(self, attribute_name, value):
         if not self.head:
             return False
-        if hasattr(self.head.data, attribute_name) and getattr(self.head.data, attribute_name) == value:
-            if self.head.next:
-                self.head.next.prev = None
-            self.head = self.head.next
-            if not self.head:
-                self.tail = None
-            self.count -= 1
+        if attribute_name in self.indexes:
+            # the node knows its neighbours, so removing through the index is O(1)
+            node = self._first_indexed_node(attribute_name, value)
+            if node is None:
+                return False
+            self.remove_node(node)
             return True
         current = self.head
         while current:
             if hasattr(current.data, attribute_name) and getattr(current.data, attribute_name) == value:
-                if current.next:
-                    current.next.prev = current.prev
-                if current.prev:
-                    current.prev.next = current.next
-                if current == self.tail:
-                    self.tail = current.prev
-                self.count -= 1
+                self.remove_node(current)
                 return True
             current = current.next
         return False
 
+    def remove_node(self, node):
+        """Unlink a node of this list in O(1)."""
+        if node.next:
+            node.next.prev = node.prev
+        if node.prev:
+            node.prev.next = node.next
+        if node is self.head:
+            self.head = node.next
+        if node is self.tail:
+            self.tail = node.prev
+        self.count -= 1
+        self._unindex_node(node)
+
     def get_reverse(self):
         items = []
         current = self.tail
@@ -153,86 +267,136 @@ class TreeNode:
 
 # Regular Binary Tree
 class BinaryTree:
+    """
+    Complete binary tree, filled level by level so the height stays at log n.
+    The nodes are also kept in an array in level order, so node i has its
+    children at 2i + 1 and 2i + 2 and inserting is O(1).
+    """
     def __init__(self):
         self.root = None
+        self.nodes = []
+
+    @classmethod
+    def from_iterable(cls, items):
+        """Build a new tree from any iterable."""
+        tree = cls()
+        tree.extend(items)
+        return tree
+
+    def extend(self, items):
+        """Insert many items at once (linear time)."""
+        for item in items:
+            self.insert(item)
+
+    def __iter__(self):
+        return self.inorder_generator()
+
+    # The traversals use an explicit stack instead of recursive yield from,
+    # so every step is O(1) and deep trees can't hit the recursion limit
 
     def preorder_generator(self, node=None):
         if node is None:
             node = self.root  # Start at root if first call
-        yield node.data
-        if node.left:
-            yield from self.preorder_generator(node.left)
-        if node.right:
-            yield from self.preorder_generator(node.right)
+        stack = [node] if node else []
+        while stack:
+            node = stack.pop()
+            yield node.data
+            if node.right:
+                stack.append(node.right)
+            if node.left:
+                stack.append(node.left) # pushed last so it is visited first
 
     def inorder_generator(self, node=None):
         if node is None:
             node = self.root
-        if node.left:
-            yield from self.inorder_generator(node.left)
-        yield node.data
-        if node.right:
-            yield from self.inorder_generator(node.right)
+        stack = []
+        while stack or node:
+            while node: # go as far left as possible
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.data
+            node = node.right
 
     def postorder_generator(self, node=None):
         if node is None:
             node = self.root
-        if node.left:
-            yield from self.postorder_generator(node.left)
-        if node.right:
-            yield from self.postorder_generator(node.right)
-        yield node.data
+        stack = []
+        last_visited = None
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            peek = stack[-1]
+            if peek.right and peek.right is not last_visited:
+                node = peek.right # right subtree not done yet
+            else:
+                yield peek.data
+                last_visited = stack.pop()
 
     def insert(self, data):
+        new_node = TreeNode(data)
         if not self.root:
-            self.root = TreeNode(data)
+            self.root = new_node
         else:
-            self._insert(self.root, data)
-
-    def _insert(self, current, data):
-        if current.left is None:
-            current.left = TreeNode(data)
-        elif current.right is None:
-            current.right = TreeNode(data)
-        else:
-            # You can choose how to insert when both left and right are filled
-            self._insert(current.left, data)
+            parent = self.nodes[(len(self.nodes) - 1) // 2]
+            if parent.left is None:
+                parent.left = new_node
+            else:
+                parent.right = new_node
+        self.nodes.append(new_node)
 
     def inorder(self, node=None):
-        if node is None:
-            node = self.root
-        if node:
-            if node.left:
-                self.inorder(node.left)
-            print(node.data, end=" ")
-            if node.right:
-                self.inorder(node.right)
+        for data in self.inorder_generator(node):
+            print(data, end=" ")
 
     def preorder(self, node=None):
-        if node is None:
-            node = self.root
-        if node:
-            print(node.data, end=" ")
-            if node.left:
-                self.preorder(node.left)
-            if node.right:
-                self.preorder(node.right)
+        for data in self.preorder_generator(node):
+            print(data, end=" ")
 
     def postorder(self, node=None):
-        if node is None:
-            node = self.root
-        if node:
-            if node.left:
-                self.postorder(node.left)
-            if node.right:
-                self.postorder(node.right)
-            print(node.data, end=" ")
+        for data in self.postorder_generator(node):
+            print(data, end=" ")
 
 # Binary Search Tree (BST) (no self-balancing)
 class BST(BinaryTree):
     def __init__(self):
         super().__init__()
 
+    def extend(self, items):
+        """
+        Insert many items at once by sorting them and rebuilding a balanced tree.
+        Costs O(N log N) for the sort, the merge and rebuild are linear.
+        Like insert, duplicates are ignored and items already in the tree win.
+        """
+        new_items = sorted(items) # stable, so the first of equal items stays first
+        existing = list(self.inorder_generator()) if self.root else []
+
+        # merge the two sorted runs, dropping duplicates
+        merged = []
+        i = j = 0
+        while i < len(existing) or j < len(new_items):
+            if j >= len(new_items) or (i < len(existing) and not new_items[j] < existing[i]):
+                candidate = existing[i]
+                i += 1
+            else:
+                candidate = new_items[j]
+                j += 1
+            if not merged or merged[-1] < candidate:
+                merged.append(candidate)
+
+        self.root = self._build_balanced(merged, 0, len(merged) - 1)
+
+    def _build_balanced(self, items, low, high):
+        # recursion depth is only log n, since each call halves the range
+        if low > high:
+            return None
+        mid = (low + high) // 2
+        node = TreeNode(items[mid])
+        node.left = self._build_balanced(items, low, mid - 1)
+        node.right = self._build_balanced(items, mid + 1, high)
+        return node
+
     def insert(self, data):
         if not self.root:
             self.root = TreeNode(data)
@@ -264,6 +428,128 @@ class BST(BinaryTree):
         else:
             return self._search(node.right, target)
 
+# AVL Tree (self-balancing BST)
+
+class AVLNode(TreeNode):
+    def __init__(self, data):
+        super().__init__(data)
+        self.height = 1
+
+class AVLTree(BST):
+    """
+    Drop-in replacement for BST that rebalances after every insert,
+    so the height stays O(log n) even when the input arrives sorted.
+    Insert and search are iterative, so deep files can't hit the recursion limit.
+    """
+    def __init__(self):
+        super().__init__()
+
+    def extend(self, items):
+        """
+        Bulk build (see BST.extend) into an empty tree. A tree that already holds items gets
+        them inserted one by one, O(k log n) instead of rebuilding all n + k items.
+        """
+        if not self.root:
+            super().extend(items)
+            return
+        for item in items:
+            self.insert(item)
+
+    def insert(self, data):
+        if not self.root:
+            self.root = AVLNode(data)
+            return
+
+        # walk down, remembering the path so we can rebalance on the way back up
+        path = []
+        current = self.root
+        while current:
+            path.append(current)
+            if data < current.data:
+                if current.left is None:
+                    current.left = AVLNode(data)
+                    break
+                current = current.left
+            elif data > current.data:
+                if current.right is None:
+                    current.right = AVLNode(data)
+                    break
+                current = current.right
+            else:
+                return # duplicates are ignored, same as BST
+
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            balanced = self._rebalance(node)
+            if balanced is not node:
+                if i == 0:
+                    self.root = balanced
+                elif path[i - 1].left is node:
+                    path[i - 1].left = balanced
+                else:
+                    path[i - 1].right = balanced
+
+    def search(self, target):
+        current = self.root
+        while current:
+            if current.data == target:
+                return current
+            elif current.data > target:
+                current = current.left
+            else:
+                current = current.right
+        return None # Not found
+
+    def _build_balanced(self, items, low, high):
+        if low > high:
+            return None
+        mid = (low + high) // 2
+        node = AVLNode(items[mid])
+        node.left = self._build_balanced(items, low, mid - 1)
+        node.right = self._build_balanced(items, mid + 1, high)
+        self._update_height(node)
+        return node
+
+    @staticmethod
+    def _height(node):
+        return node.height if node else 0
+
+    def _update_height(self, node):
+        node.height = 1 + max(self._height(node.left), self._height(node.right))
+
+    def _balance_factor(self, node):
+        return self._height(node.left) - self._height(node.right)
+
+    def _rotate_right(self, node):
+        new_root = node.left
+        node.left = new_root.right
+        new_root.right = node
+        self._update_height(node)
+        self._update_height(new_root)
+        return new_root
+
+    def _rotate_left(self, node):
+        new_root = node.right
+        node.right = new_root.left
+        new_root.left = node
+        self._update_height(node)
+        self._update_height(new_root)
+        return new_root
+
+    def _rebalance(self, node):
+        """Fix the height of node and rotate if it is out of balance, returns the new subtree root."""
+        self._update_height(node)
+        balance = self._balance_factor(node)
+        if balance > 1:
+            if self._balance_factor(node.left) < 0: # left-right case
+                node.left = self._rotate_left(node.left)
+            return self._rotate_right(node)
+        if balance < -1:
+            if self._balance_factor(node.right) > 0: # right-left case
+                node.right = self._rotate_right(node.right)
+            return self._rotate_left(node)
+        return node
+
 # Dynamic Array
 
 class DynamicArray:
@@ -272,32 +558,71 @@ class DynamicArray:
         self.size = 0
         self.capacity = initial_capacity
 
+    @classmethod
+    def from_iterable(cls, items):
+        """Build a new array from any iterable, sized to fit when the length is known."""
+        capacity = len(items) if hasattr(items, "__len__") else 10
+        new_array = cls(max(capacity, 10))
+        new_array.extend(items)
+        return new_array
+
     def __iter__(self):
+        array = self.array
         for i in range(self.size):
-            yield self.get(i)
+            yield array[i]
 
     def __len__(self):
-        return self.get_size()
+        return self.size
     
     def __getitem__(self, index):
-        """Retrieve an item by index, returns None if out of bounds."""
-        for i in range(self.size):
-            if i == index:
-                return self.array[i]
+        """
+        Retrieve an item by index in O(1), returns None if out of bounds.
+        Negative indexes count from the end, slices return a DynamicArrayView without copying.
+        """
+        if isinstance(index, slice):
+            return DynamicArrayView(self, range(self.size)[index])
+        if index < 0:
+            index += self.size
+        if 0 <= index < self.size:
+            return self.array[index]
+        return None
+
+    def __setitem__(self, index, item):
+        """Replace the item at index, lets algorithms work on the array in place."""
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("DynamicArray index out of range")
+        self.array[index] = item
 
     def add(self, item):
-        """Add an item to the array. Resizes if needed."""
+        """Add an item to the array. Resizes if needed (amortized O(1) since the capacity doubles)."""
         if self.size >= self.capacity:
             self._resize(self.capacity * 2)
         
         self.array[self.size] = item
         self.size += 1
 
+    def extend(self, items):
+        """Add many items, resizing at most once when the length is known up front."""
+        if hasattr(items, "__len__"):
+            needed = self.size + len(items)
+            if needed > self.capacity:
+                new_capacity = self.capacity
+                while new_capacity < needed:
+                    new_capacity *= 2
+                self._resize(new_capacity)
+            for item in items:
+                self.array[self.size] = item
+                self.size += 1
+        else:
+            for item in items:
+                self.add(item)
+
     def _resize(self, new_capacity):
         """Resize the internal array to the new capacity."""
         new_array = [None] * new_capacity
-        for i in range(self.size):
-            new_array[i] = self.array[i]
+        new_array[:self.size] = self.array[:self.size] # block copy, like memcpy
 
         self.array = new_array
         self.capacity = new_capacity
@@ -312,8 +637,7 @@ class DynamicArray:
         """Remove the item from the array and shift elements."""
         for i in range(self.size):
             if self.array[i] == item:
-                for j in range(i, self.size - 1):
-                    self.array[j] = self.array[j + 1]
+                self.array[i:self.size - 1] = self.array[i + 1:self.size] # shift the tail down in one block, like memmove
 
                 self.array[self.size - 1] = None
                 self.size -= 1
@@ -325,14 +649,159 @@ class DynamicArray:
                 return True
         return False
 
+    def remove_where(self, predicate):
+        """
+        Remove every item for which predicate(item) is true in a single pass,
+        moving the kept items down as we go. Returns the number of removed items.
+        """
+        write = 0
+        for read in range(self.size):
+            item = self.array[read]
+            if not predicate(item):
+                self.array[write] = item
+                write += 1
+
+        removed = self.size - write
+        for i in range(write, self.size):
+            self.array[i] = None # drop references so the objects can be freed
+        self.size = write
+
+        if self.size < self.capacity // 4 and self.capacity > 10:
+            self.compact()
+        return removed
+
+    def compact(self):
+        """Shrink the capacity to fit the current size (but never below 10)."""
+        self._resize(max(self.size, 10))
+
     def get_size(self):
         """Return the number of elements in the array."""
         return self.size
 
     def get_all(self):
-        """Return a list of all non-None elements in the array."""
-        return [self.array[i] for i in range(self.size) if self.array[i]]
+        """Return a list of all elements in the array."""
+        return self.array[:self.size]
 
     def __str__(self):
         """Return a string representation of the array."""
-        return str([self.array[i] for i in range(self.size)])
+        return str(self.array[:self.size])
+
+
+class DynamicArrayView:
+    """
+    Read only window over part of a DynamicArray, returned by slicing.
+    Nothing is copied, the view reads through to the array it came from.
+    """
+    def __init__(self, source, indexes):
+        self.source = source
+        self.indexes = indexes # a range object, so it takes O(1) memory
+
+    def __iter__(self):
+        array = self.source.array
+        for i in self.indexes:
+            yield array[i]
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return DynamicArrayView(self.source, self.indexes[index])
+        if index < 0:
+            index += len(self.indexes)
+        if 0 <= index < len(self.indexes):
+            return self.source.array[self.indexes[index]]
+        return None
+
+    def get_size(self):
+        return len(self.indexes)
+
+    def get_all(self):
+        """Return a list copy of the items in the view."""
+        return list(self)
+
+    def __str__(self):
+        return str(self.get_all())
+
+
+# Sorted Index
+
+class SortedIndex:
+    """
+    Ordered index over the items of any container, kept as two parallel sorted arrays
+    (keys and items). Range and prefix scans are a binary search plus a walk over the
+    matches, so O(log n + k).
+    """
+    def __init__(self, items, key_func):
+        if isinstance(items, BinaryTree):
+            items = items.inorder_generator()
+        items = list(items)
+        keys = [key_func(item) for item in items] # every key is computed only once
+        order = sorted(range(len(items)), key=keys.__getitem__) # stable, equal keys keep their order
+        self.key_func = key_func
+        self.keys = [keys[i] for i in order]
+        self.items = [items[i] for i in order]
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def get_all(self):
+        return list(self.items)
+
+    def insert(self, item):
+        """Add an item after any items with an equal key (O(n) because of the shifting)."""
+        key = self.key_func(item)
+        position = bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.items.insert(position, item)
+
+    def range_search(self, low=None, high=None):
+        """All items with low <= key <= high, either bound can be None for an open range."""
+        start = 0 if low is None else bisect_left(self.keys, low)
+        end = len(self.keys) if high is None else bisect_right(self.keys, high)
+        return self.items[start:end]
+
+    def prefix_search(self, prefix):
+        """All items whose (string) key starts with prefix."""
+        start = bisect_left(self.keys, prefix)
+        end = start
+        while end < len(self.keys) and self.keys[end].startswith(prefix):
+            end += 1
+        return self.items[start:end]
+
+
+class SortedViewCache:
+    """
+    Keeps SortedIndex views of one dataset around, one per attribute (or any other
+    cache key), so a dataset is only sorted once per attribute instead of once per query.
+    Least recently used views are dropped beyond max_views to bound the memory.
+    Call invalidate() whenever the dataset changes, every call bumps the version.
+    """
+    def __init__(self, max_views=4):
+        self.max_views = max_views
+        self.views = OrderedDict()
+        self.source = None
+        self.version = 0
+
+    def invalidate(self, source=None):
+        """Drop all views, source is the dataset that future views will be built from."""
+        self.views.clear()
+        self.source = source
+        self.version += 1
+
+    def get(self, source, cache_key, key_func):
+        """Sorted view of source for cache_key, built with key_func if it isn't cached."""
+        if source is not self.source:
+            self.invalidate(source) # a different dataset, nothing cached applies to it
+        view = self.views.get(cache_key)
+        if view is None:
+            view = SortedIndex(source, key_func)
+            self.views[cache_key] = view
+            if len(self.views) > self.max_views:
+                self.views.popitem(last=False)
+        else:
+            self.views.move_to_end(cache_key)
+        return view
@@ -3,16 +3,80 @@ from tkinter import messagebox, filedialog, ttk, scrolledtext
 import data_structures as ds
 import algorithms as algo
 import utils
+import query
+import storage
 import time
+import os
+import threading
 
 pady = 5
 
 def try_int_conversion(val):
+    if not isinstance(val, str):
+        return val # already typed (ints, restaurant type lists)
     try:
         return int(val)
     except ValueError:
         return val
 
+POLL_MS = 50 # how often the Tk thread checks on a background job
+
+
+def timed(func, *args):
+    """Call func(*args), returns its result and the seconds it took"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class Cancelled(Exception):
+    """Raised inside a background job at its next progress report once Cancel was pressed"""
+
+
+class BackgroundJob:
+    """
+    Runs work(job) on a daemon thread. The worker never touches Tk: it only sets plain
+    attributes (progress, result, error), which the Tk thread picks up when it polls.
+    Cancelling is cooperative, work has to call report() now and then to be stopped early.
+    Work that finishes anyway (it was past its last report) is applied as usual, so work
+    changing shared data should report right before it starts changing it.
+    """
+    def __init__(self, work, on_done, on_error=None, on_progress=None):
+        self.work = work
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.progress = None
+        self.result = None
+        self.error = None
+        self.stopped = False # set once work was actually stopped by a cancel
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        try:
+            self.result = self.work(self)
+        except Cancelled:
+            self.stopped = True
+        except Exception as e:
+            self.error = e
+
+    def start(self):
+        self.thread.start()
+
+    def report(self, progress):
+        """Called from the work function with its progress, raises Cancelled once the job is cancelled"""
+        if self.cancelled.is_set():
+            raise Cancelled()
+        self.progress = progress
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def is_running(self):
+        return self.thread.is_alive()
+
+
 class Application():
     def __init__(self):
         self.tk = tk.Tk()
@@ -22,12 +86,17 @@ class Application():
                            "Singly Linked List": ds.SinglyLinkedList,
                            "Doubly Linked List": ds.DoublyLinkedList,
                            "Binary Tree": ds.BinaryTree,
-                           "BST": ds.BST}
-        self.sorting_algorithms = {"Quicksort": algo.quicksort, "Merge sort": algo.merge_sort}
-        self.search_algorithms = {"Linear Search": algo.linear_search, "Binary Search": algo.binary_search_by_key}
-        self.search_algorithms_trees = {"DFS Search": algo.dfs_search, "BFS Search": algo.bfs_search, "BST Search": algo.bst_search}
+                           "BST": ds.BST,
+                           "AVL Tree": ds.AVLTree}
+        self.sorting_algorithms = {"Quicksort": algo.quicksort, "Merge sort": algo.merge_sort, "Parallel sort": algo.parallel_sort,
+                                   "Counting sort": algo.counting_sort, "Radix sort": algo.radix_sort, "Auto sort": algo.auto_sort}
+        self.search_algorithms = {"Linear Search": algo.linear_search, "Binary Search": algo.binary_search_by_key, "Query Search": query.search}
+        self.search_algorithms_trees = {"DFS Search": algo.dfs_search, "BFS Search": algo.bfs_search, "BST Search": algo.bst_search, "Query Search": query.search}
+        self.range_algorithms = {"Range Search": algo.range_search, "Prefix Search": algo.prefix_search}
+        self.selection_algorithms = {"Top-k Largest": algo.nlargest, "Top-k Smallest": algo.nsmallest, "Quickselect (k-th smallest)": algo.quickselect}
         self.search_key = None
         self.search_attribute = None
+        self.sort_keys = [] # (attribute, descending) pairs picked for a multi-key sort, in priority order
 
         self.model_class = None
         self.operation_type = None
@@ -35,6 +104,10 @@ class Application():
 
         self.raw_data = None
         self.memory = None
+        self.sorted_views = ds.SortedViewCache() # sorted views of self.memory, invalidated whenever memory changes
+        self.snapshots = storage.SnapshotCache() # parsed copies of imported files, so unchanged files load without parsing
+        self.import_cursor = None # how far the current file has been loaded, for incremental reimports
+        self.job = None # the BackgroundJob loading a file or running an algorithm, if any
 
         self.tk.title("Algorithm & Datastructure Demo")
         self.tk.geometry("1000x600")
@@ -52,6 +125,14 @@ class Application():
         self.reimport_button.grid(row=0, column=2, pady=pady, sticky="w")
         self.reimport_button.grid_remove()
 
+        self.incremental_var = tk.BooleanVar(value=True)
+        self.incremental_check = tk.Checkbutton(self.tk, text="Only load appended rows", variable=self.incremental_var)
+        self.incremental_check.grid(row=1, column=2, pady=pady, sticky="w")
+        self.incremental_check.grid_remove()
+
+        self.rows_loaded_label = tk.Label(self.tk, text="")
+        self.rows_loaded_label.grid(row=0, column=3, pady=pady, sticky="w")
+
         # Data Structure
         self.data_structure_label = tk.Label(self.tk, text="Please Select a Data Structure")
         self.data_structure_label.grid(row=1, column=0, pady=pady, sticky="w")
@@ -65,7 +146,7 @@ class Application():
         self.operation_label = tk.Label(self.tk, text="Please Select an Operation")
         self.operation_label.grid(row=3, column=0, pady=pady, sticky="w")
 
-        self.operation_options = ttk.Combobox(self.tk, values=["Sort", "Search"])
+        self.operation_options = ttk.Combobox(self.tk, values=["Sort", "Search", "Range Search", "Top-k / Select"])
         self.operation_options.grid(row=4, column=0, pady=pady, sticky="w")
         self.operation_options.set("Select Operation")
         self.operation_options.bind("<<ComboboxSelected>>", self.select_operation)
@@ -79,6 +160,15 @@ class Application():
         self.algorithm_options.set("Select Algorithm")
         self.algorithm_options.grid_remove()
         self.algorithm_options.bind("<<ComboboxSelected>>", self.select_algo)
+
+        # Multi-key sort: click the keys in priority order, leave empty to sort on the attribute below
+        self.sort_keys_label = tk.Label(self.tk, text="Sort by (click in priority order, optional)")
+        self.sort_keys_label.grid(row=3, column=1, columnspan=2, pady=pady, sticky="w")
+        self.sort_keys_label.grid_remove()
+        self.sort_keys_box = tk.Listbox(self.tk, selectmode=tk.MULTIPLE, height=6, exportselection=False)
+        self.sort_keys_box.grid(row=4, column=1, rowspan=3, columnspan=2, pady=pady, sticky="w")
+        self.sort_keys_box.bind("<<ListboxSelect>>", self.select_sort_keys)
+        self.sort_keys_box.grid_remove()
         self.search_attr = ttk.Combobox(self.tk, values=["Load Data First"])
         self.search_attr.grid(row=7, column=0, pady=pady, sticky="w")
         self.search_attr.set("Select Search Attribute")
@@ -89,10 +179,30 @@ class Application():
         self.search_key = ttk.Entry(self.tk)
         self.search_key.grid(row=7, column=2, pady=pady, sticky="w")
         self.search_key.grid_remove()
+        self.range_end_label = tk.Label(self.tk, text="To (leave empty for no limit)")
+        self.range_end_label.grid(row=7, column=3, pady=pady, sticky="w")
+        self.range_end_label.grid_remove()
+        self.range_end = ttk.Entry(self.tk)
+        self.range_end.grid(row=7, column=4, pady=pady, sticky="w")
+        self.range_end.grid_remove()
 
         self.run_button = tk.Button(self.tk, text="Run Algorithm", command=self.run_algorithm)
         self.run_button.grid(row=8, column=0, pady=pady, sticky="w")
 
+        self.workers_label = tk.Label(self.tk, text="Parallel sort workers")
+        self.workers_label.grid(row=8, column=1, pady=pady, sticky="w")
+        self.workers_label.grid_remove()
+        self.workers_box = ttk.Spinbox(self.tk, from_=1, to=os.cpu_count() or 1, width=5)
+        self.workers_box.grid(row=8, column=2, pady=pady, sticky="w")
+        self.workers_box.set(os.cpu_count() or 1)
+        self.workers_box.grid_remove()
+
+        self.cancel_button = tk.Button(self.tk, text="Cancel", command=self.cancel_job)
+        self.cancel_button.grid(row=8, column=3, pady=pady, sticky="w")
+        self.cancel_button.grid_remove()
+        self.job_label = tk.Label(self.tk, text="")
+        self.job_label.grid(row=8, column=4, pady=pady, sticky="w")
+
         # Display Results
         self.results_box = scrolledtext.ScrolledText(self.tk, wrap=tk.WORD, width=80, height=20)
         self.results_box.grid(row=9, column=0, columnspan=5, padx=10, pady=10, sticky="nsew")
@@ -111,16 +221,18 @@ class Application():
         if self.filename:
             self.import_file_label.config(text=f"Selected file: {self.filename}", background="green", foreground="white")
             self.reimport_button.grid()
+            self.incremental_check.grid()
         else:
             self.import_file_label.config(text="Please Select a File", background="white", foreground="black")
             self.reimport_button.grid_remove()
+            self.incremental_check.grid_remove()
 
 
     def update_ds_widget(self):
         if self.data_structure:
             self.data_structure_label.config(text=f"Selected Data Structure: {self.data_structure_options.get()}", background="green", foreground="white")
     
-    def update_results_widget(self, status):
+    def update_results_widget(self, status, results=None):
         """
         out = ""
         generator = self.memory
@@ -145,14 +257,15 @@ class Application():
         self.results_label.config(text=f"{status} Execution Results: {out}", background="black", foreground="white")
         """
         output = ""
-        gen = self.memory
+        shown = self.memory if results is None else results # results are shown instead of memory when given
+        gen = shown
 
-        if isinstance(self.memory, ds.BinaryTree):
-            gen = self.memory.inorder_generator()
-        elif isinstance(self.memory, ds.SinglyLinkedList):
-            gen = self.memory.get_all()
-        elif not isinstance(self.memory, (ds.SinglyLinkedList, ds.DynamicArray)):
-            gen = [self.memory]
+        if isinstance(shown, ds.BinaryTree):
+            gen = shown.inorder_generator()
+        elif isinstance(shown, ds.SinglyLinkedList):
+            gen = shown.get_all()
+        elif not isinstance(shown, (ds.SinglyLinkedList, ds.DynamicArray)):
+            gen = [shown]
 
         for item in gen:
             if isinstance(item, ds.TreeNode):
@@ -168,40 +281,157 @@ class Application():
         self.results_box.config(state='disabled')  # Make read-only again
         
     def select_file(self):
+        if self.job:
+            return
         filename = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
         if filename:
-            self.filename = filename
-            self.import_file(filename)
-            messagebox.showinfo("File Imported", f"File '{filename}' imported successfully.")
+            def imported():
+                self.filename = filename
+                self.update_file_widget()
+                messagebox.showinfo("File Imported", f"File '{filename}' imported successfully.")
+            self.import_file(filename, imported)
         else:
             messagebox.showerror("Error", "No file selected.")
 
-        self.update_file_widget()
-
-    def import_file(self, filename):
-        headers, data = utils.import_csv(filename)
-        if headers and data:
-            self.model_class = utils.match_headers(headers)
-            if self.model_class:
-                objects = utils.data_to_objects(data, headers)
-                self.load_data(objects, self.data_structure)
+    def import_file(self, filename, on_loaded=None):
+        """Load filename on a worker thread, on_loaded() is called (on the Tk thread) if that worked"""
+        # stream the file straight into a fresh container of the selected type, batch by batch,
+        # so the rows never sit in memory twice and a reimport doesn't add to the old data.
+        # An unchanged file comes from its snapshot instead of being parsed again
+        data_structure = self.ds_options.get(self.data_structure_options.get(), ds.DynamicArray)()
+        snapshots = self.snapshots
+        self.update_rows_loaded(0)
+
+        def work(job):
+            model_class, loaded = storage.load_csv_cached(filename, data_structure, snapshots, progress=job.report)
+            cursor = utils.ImportCursor.after_rows(filename, loaded) if model_class else None
+            return model_class, cursor
+
+        def done(outcome):
+            model_class, cursor = outcome
+            if model_class:
+                self.model_class = model_class
+                self.data_structure = data_structure
+                self.import_cursor = cursor
+                self.show_data(data_structure)
                 self.update_results_widget("Data Loaded: \n")
-            else:
+                if on_loaded:
+                    on_loaded()
+            elif os.path.exists(filename):
                 messagebox.showerror("Error", "Unknown CSV format.")
-        else:
-            messagebox.showerror("Error", "Failed to import file.")
-        
+            else:
+                messagebox.showerror("Error", "Failed to import file.")
+
+        def failed(error):
+            messagebox.showerror("Error", f"Failed to import file: {error}")
+
+        # a cancelled load leaves the data that was loaded before alone, it went into a new container
+        self.start_job(f"Loading {os.path.basename(filename)}...", work, done, failed, self.update_rows_loaded)
+
+    def update_rows_loaded(self, rows):
+        self.rows_loaded_label.config(text=f"Rows loaded: {rows}")
+
     def reimport_file(self):
-        if self.filename:
-            self.import_file(self.filename)
-            messagebox.showinfo("File Reimported", f"File '{self.filename}' reimported successfully.")
-        else:
+        if self.job:
+            return
+        if not self.filename:
             messagebox.showerror("Error", "No file selected for reimport.")
+            return
+        filename = self.filename
+        reimported = lambda: messagebox.showinfo("File Reimported", f"File '{filename}' reimported successfully.")
+        cursor = self.import_cursor
+        if not (self.incremental_var.get() and cursor and cursor.filename == filename):
+            self.import_file(filename, reimported)
+            return
+
+        # append only the new rows to the current container, unless the file was truncated or rewritten
+        data_structure = self.data_structure
+        def work(job):
+            new_rows = [] # collected first, so a cancel can't leave half of them in the container
+            new_cursor, added = utils.load_appended(cursor, new_rows, progress=lambda rows: job.report(cursor.rows + rows))
+            if new_cursor:
+                job.report(new_cursor.rows) # last chance to cancel, once the rows go in the new cursor has to be kept
+                utils.insert_into_ds(data_structure, new_rows)
+            return new_cursor, added
+
+        def done(outcome):
+            new_cursor, added = outcome
+            if not new_cursor:
+                self.import_file(filename, reimported)
+                return
+            self.import_cursor = new_cursor
+            self.update_rows_loaded(new_cursor.rows)
+            self.show_data(data_structure)
+            self.update_results_widget("Data Loaded: \n")
+            messagebox.showinfo("File Reimported", f"{added} new rows loaded from '{filename}'.")
+
+        def failed(error):
+            messagebox.showerror("Error", f"Failed to reimport file: {error}")
+
+        self.start_job(f"Loading new rows of {os.path.basename(filename)}...", work, done, failed, self.update_rows_loaded)
+
+    # Background jobs
+
+    def start_job(self, status, work, on_done, on_error=None, on_progress=None, cancellable=True):
+        """
+        Run work(job) on a worker thread, the on_ callbacks run on the Tk thread.
+        Cancel is only offered for cancellable work, the kind that calls job.report now and then.
+        """
+        self.job = BackgroundJob(work, on_done, on_error, on_progress)
+        self.set_busy(True, status, cancellable)
+        self.job.start()
+        self.tk.after(POLL_MS, self.poll_job)
+
+    def poll_job(self):
+        job = self.job
+        if job.progress is not None and job.on_progress:
+            job.on_progress(job.progress)
+        if job.is_running():
+            self.tk.after(POLL_MS, self.poll_job)
+            return
+
+        self.job = None
+        self.set_busy(False)
+        if job.stopped:
+            self.job_label.config(text="Cancelled")
+        elif job.error is not None:
+            if job.on_error:
+                job.on_error(job.error)
+            else:
+                messagebox.showerror("Error", str(job.error))
+        else:
+            job.on_done(job.result)
+
+    def cancel_job(self):
+        if self.job:
+            self.job.cancel()
+            self.job_label.config(text="Cancelling...") # loads stop at their next batch, parallel sorts at their next poll
+
+    def set_busy(self, busy, status="", cancellable=False):
+        # anything that would touch the data while the worker uses it is disabled
+        state = "disabled" if busy else "normal"
+        # (and so is anything the running algorithm was set up from)
+        for widget in (self.import_file_button, self.reimport_button, self.run_button, self.data_structure_options,
+                       self.operation_options, self.algorithm_options, self.search_attr, self.sort_keys_box):
+            widget.config(state=state)
+        self.job_label.config(text=status)
+        if busy and cancellable:
+            self.cancel_button.grid()
+        else:
+            self.cancel_button.grid_remove()
 
     def load_data(self, data, ds):
-        self.raw_data = data
-        self.memory = utils.insert_into_ds(ds, data)
-        self.search_attr.config(values=self.get_possible_attributes())
+        self.show_data(utils.insert_into_ds(ds, data))
+
+    def show_data(self, data_structure):
+        # the loaded container is also what the next data structure gets built from,
+        # memory may later be replaced by search results
+        self.raw_data = data_structure
+        self.memory = data_structure
+        self.sorted_views.invalidate(self.memory)
+        attributes = self.get_possible_attributes()
+        self.search_attr.config(values=attributes)
+        self.update_sort_keys_widget(attributes)
         print(self.memory)
 
     def select_data_structure(self, event):
@@ -221,6 +451,10 @@ class Application():
                     search_options = list(self.search_algorithms.keys())                
             elif self.operation_type == "Sort":
                 self.search_options = list(self.sorting_algorithms.keys())
+            elif self.operation_type == "Range Search":
+                search_options = list(self.range_algorithms.keys())
+            elif self.operation_type == "Top-k / Select":
+                search_options = list(self.selection_algorithms.keys())
         else:
             messagebox.showerror("Error", "Invalid data structure selected.")
             return
@@ -231,15 +465,54 @@ class Application():
         if selected_op == "Sort":
             self.operation_type = "Sort"
             self.algorithm_options.config(values=list(self.sorting_algorithms.keys()))
+            self.range_end_label.grid_remove()
+            self.range_end.grid_remove()
+            self.workers_label.grid()
+            self.workers_box.grid()
+            self.sort_keys_label.grid()
+            self.sort_keys_box.grid()
             
+        elif selected_op == "Range Search":
+            self.operation_type = "Range Search"
+            self.algorithm_options.config(values=list(self.range_algorithms.keys()))
+            self.search_key_label.config(text="From (or prefix)")
+            self.workers_label.grid_remove()
+            self.workers_box.grid_remove()
+            self.sort_keys_label.grid_remove()
+            self.sort_keys_box.grid_remove()
+            self.search_key_label.grid()
+            self.search_key.grid()
+            self.range_end_label.grid()
+            self.range_end.grid()
+
+        elif selected_op == "Top-k / Select":
+            self.operation_type = "Top-k / Select"
+            self.algorithm_options.config(values=list(self.selection_algorithms.keys()))
+            self.search_key_label.config(text="k (quickselect: blank for the median)")
+            self.search_key_label.grid()
+            self.search_key.grid()
+            self.range_end_label.grid_remove()
+            self.range_end.grid_remove()
+            self.workers_label.grid_remove()
+            self.workers_box.grid_remove()
+            self.sort_keys_label.grid_remove()
+            self.sort_keys_box.grid_remove()
+
         elif selected_op == "Search":
             self.operation_type = "Search"
             if isinstance(self.data_structure, ds.BinaryTree):
                 self.algorithm_options.config(values=list(self.search_algorithms_trees.keys()))
             else:
                 self.algorithm_options.config(values=list(self.search_algorithms.keys()))
+            self.search_key_label.config(text="Please Enter Search Key")
+            self.workers_label.grid_remove()
+            self.workers_box.grid_remove()
+            self.sort_keys_label.grid_remove()
+            self.sort_keys_box.grid_remove()
             self.search_key_label.grid()
             self.search_key.grid()
+            self.range_end_label.grid_remove()
+            self.range_end.grid_remove()
         else:
             messagebox.showerror("Error", "Invalid operation selected.")
             return
@@ -258,12 +531,43 @@ class Application():
             self.chosen_algorithm = self.search_algorithms[selected_algo]
         elif selected_algo in self.search_algorithms_trees:
             self.chosen_algorithm = self.search_algorithms_trees[selected_algo]
+        elif selected_algo in self.range_algorithms:
+            self.chosen_algorithm = self.range_algorithms[selected_algo]
+        elif selected_algo in self.selection_algorithms:
+            self.chosen_algorithm = self.selection_algorithms[selected_algo]
         else:
             messagebox.showerror("Error", "Invalid algorithm selected.")
             return
         
         self.algorithm_label.config(text=f"Selected Algorithm: {self.algorithm_options.get()}", background="green", foreground="white")
 
+    def update_sort_keys_widget(self, attributes):
+        self.sort_keys = []
+        self.sort_keys_box.delete(0, tk.END)
+        for attribute in attributes:
+            self.sort_keys_box.insert(tk.END, f"{attribute} ascending")
+            self.sort_keys_box.insert(tk.END, f"{attribute} descending")
+
+    def select_sort_keys(self, event):
+        """Keep self.sort_keys in the order the entries were clicked"""
+        selected = [self.sort_keys_box.get(i) for i in self.sort_keys_box.curselection()]
+        picked = []
+        for entry in selected:
+            attribute, direction = entry.rsplit(" ", 1)
+            picked.append((attribute, direction == "descending"))
+        self.sort_keys = [key for key in self.sort_keys if key in picked] + [key for key in picked if key not in self.sort_keys]
+        if self.sort_keys:
+            order = ", ".join(f"{attribute} {'desc' if descending else 'asc'}" for attribute, descending in self.sort_keys)
+            self.sort_keys_label.config(text=f"Sort by: {order}")
+        else:
+            self.sort_keys_label.config(text="Sort by (click in priority order, optional)")
+
+    def get_sort_key_func(self, attribute):
+        """Composite key for the picked sort keys, or the single search attribute if none were picked"""
+        if self.sort_keys:
+            return algo.multi_key(self.sort_keys)
+        return lambda x: self.get_range_key(self.get_attr(x, attribute), attribute)
+
     def select_search_attribute(self, event):
         self.search_attribute = self.search_attr.get()
         if self.search_attribute and isinstance(self.data_structure, ds.BST):
@@ -273,40 +577,157 @@ class Application():
                 new_bst.insert(item)
 
     def run_algorithm(self):
-        if self.chosen_algorithm is algo.binary_search_by_key:
-            algo.quicksort(self.memory, lambda x: self.get_attr(x))
-        
-        if self.chosen_algorithm in self.search_algorithms.values():
-            start_time = time.time()
-            self.memory = self.chosen_algorithm(self.memory, try_int_conversion(self.search_key.get()), lambda x: self.get_attr(x))
-            end_time = time.time()
-        elif self.chosen_algorithm in self.sorting_algorithms.values():
-            start_time = time.time()
-            self.memory = self.chosen_algorithm(self.memory, lambda x: self.get_attr(x))
-            end_time = time.time()
-        if self.chosen_algorithm in self.search_algorithms_trees.values():
-            if isinstance(self.memory, ds.TreeNode):
-                gen = [self.memory]
-            else:
-                gen = self.memory.inorder_generator()
-            for item in gen:
-                item.set_compare_attribute(self.search_attribute)
-            start_time = time.time()
-            self.memory = self.chosen_algorithm(self.memory, try_int_conversion(self.search_key.get()))
-            end_time = time.time()
+        if self.job:
+            return # one job at a time, the buttons are disabled meanwhile anyway
+        work, error_text, replaces_memory = self.prepare_algorithm()
+        if work is None:
+            return
+
+        def done(outcome):
+            value, seconds = outcome
+            if replaces_memory:
+                self.memory = value
+                self.sorted_views.invalidate(self.memory) # memory now holds the results
+            self.execution_time_label.config(text=f"Execution Time: {seconds:.4f} seconds")
+            self.execution_time_label.grid()
+            self.update_results_widget("Algorithm Executed: \n", None if replaces_memory else value)
+
+        def failed(error):
+            messagebox.showerror("Error", f"{error_text}: {error}")
 
-        self.execution_time_label.config(text=f"Execution Time: {end_time - start_time:.4f} seconds")
-        self.execution_time_label.grid()
+        self.start_job(f"Running {self.algorithm_options.get()}...", work, done, failed,
+                       cancellable=self.chosen_algorithm is algo.parallel_sort)
+
+    def prepare_algorithm(self):
+        """
+        Read and check everything the chosen algorithm needs from the widgets and the app state
+        (search attribute, sort keys, memory), here on the Tk thread, and return (work,
+        error_text, replaces_memory). work(job) only uses those copies, it runs on the worker thread
+        and returns the algorithm's result and the seconds spent in the algorithm alone (building
+        a sorted view or setting compare attributes is not timed). Errors it raises are shown
+        prefixed with error_text. replaces_memory says if the result becomes the new memory or
+        is only shown. Returns None, None, None if the input is invalid, after showing why.
+        """
+        algorithm = self.chosen_algorithm
+        memory = self.memory
+        attribute = self.search_attribute
+        search_key = self.search_key.get()
+        if algorithm is None:
+            messagebox.showerror("Error", "Please select an algorithm first.")
+            return None, None, None
+
+        if algorithm is query.search:
+            # the search key holds a whole query (e.g. "age >= 20 and ticket_tier = gold"), the attribute box is ignored
+            try:
+                predicate = query.compile_query(search_key)
+            except ValueError as e:
+                messagebox.showerror("Error", f"Invalid query: {e}")
+                return None, None, None
+            return (lambda job: timed(lambda: list(algorithm(memory, predicate)))), "Query failed", False
 
-        self.update_results_widget("Algorithm Executed: \n")
+        if algorithm is algo.binary_search_by_key:
+            try:
+                target = self.get_range_key(search_key, attribute)
+            except ValueError as e:
+                messagebox.showerror("Error", f"Invalid search key: {e}")
+                return None, None, None
+            def binary_search(job):
+                view = self.get_sorted_view(memory, attribute)
+                # keys are precomputed, so O(log n), and we get every match
+                (first, last), seconds = timed(algo.equal_range, view.keys, target)
+                return view.items[first:last], seconds # memory is left alone, so the view stays cached
+            return binary_search, "Invalid search key", False
+
+        if algorithm in self.search_algorithms.values():
+            key_func = lambda x: self.get_attr(x, attribute)
+            return (lambda job: timed(algorithm, memory, try_int_conversion(search_key), key_func)), "Search failed", True
+
+        if algorithm is algo.parallel_sort:
+            try:
+                workers = int(self.workers_box.get())
+            except ValueError:
+                messagebox.showerror("Error", "Worker count must be a whole number.")
+                return None, None, None
+            key_func = self.get_sort_key_func(attribute)
+            # the only algorithm that can be cancelled, it checks in with job.report while the chunks are sorted
+            return (lambda job: timed(algorithm, memory, key_func, workers, job.report)), "Parallel sort failed", True
+
+        if algorithm in self.sorting_algorithms.values():
+            # typed keys: tiers by rank and numbers as numbers, which also lets counting/radix sort apply
+            key_func = self.get_sort_key_func(attribute)
+            return (lambda job: timed(algorithm, memory, key_func)), f"Can't sort on this attribute with {self.algorithm_options.get()}", True
+
+        if algorithm in self.range_algorithms.values():
+            prefix = algorithm is algo.prefix_search
+            try:
+                low = self.get_range_key(search_key, attribute) if search_key and not prefix else None
+                high = self.get_range_key(self.range_end.get(), attribute) if self.range_end.get() and not prefix else None
+            except ValueError as e:
+                messagebox.showerror("Error", f"Invalid range: {e}")
+                return None, None, None
+            def range_search(job):
+                index = self.get_sorted_view(memory, attribute, prefix=prefix)
+                if prefix:
+                    return timed(algorithm, index, search_key, lambda x: self.get_attr(x, attribute))
+                return timed(algorithm, index, low, high, lambda x: self.get_range_key(self.get_attr(x, attribute), attribute))
+            return range_search, "Invalid range", False # memory is left alone, so the index can be reused by the next range query
+
+        if algorithm in self.selection_algorithms.values():
+            key_func = lambda x: self.get_range_key(self.get_attr(x, attribute), attribute)
+            try:
+                k = int(search_key) if search_key or algorithm is not algo.quickselect else None
+            except ValueError as e:
+                messagebox.showerror("Error", f"Invalid k: {e}")
+                return None, None, None
+            if algorithm is not algo.quickselect:
+                return (lambda job: timed(algorithm, memory, k, key_func)), "Invalid k", False
+            def select(job):
+                if k is not None:
+                    index = k - 1 # k is 1 based in the box
+                elif isinstance(memory, ds.BinaryTree):
+                    index = (sum(1 for _ in memory.inorder_generator()) - 1) // 2 # trees don't keep a count
+                else:
+                    index = (len(memory) - 1) // 2
+                item, seconds = timed(algorithm, memory, index, key_func)
+                return [item], seconds
+            return select, "Invalid k", False
+
+        if algorithm in self.search_algorithms_trees.values():
+            target = try_int_conversion(search_key)
+            def tree_search(job):
+                gen = [memory] if isinstance(memory, ds.TreeNode) else memory.inorder_generator()
+                for item in gen:
+                    item.set_compare_attribute(attribute)
+                return timed(algorithm, memory, target)
+            return tree_search, "Search failed", True
+
+        messagebox.showerror("Error", "Invalid algorithm selected.")
+        return None, None, None
+
+    def get_range_key(self, value, attribute):
+        """Turn a value of attribute (or a typed in bound) into something that orders correctly."""
+        if attribute == "ticket_tier":
+            return utils.tier_order.index(str(value).lower()) # tiers are ordered by rank, not alphabetically
+        return try_int_conversion(value)
+
+    def get_sorted_view(self, memory, attribute, prefix=False):
+        """
+        Sorted view of memory for attribute, built once and reused.
+        Prefix searches need the keys as strings, so they get their own view.
+        """
+        if prefix:
+            key_func = lambda x: str(self.get_attr(x, attribute))
+        else:
+            key_func = lambda x: self.get_range_key(self.get_attr(x, attribute), attribute)
+        return self.sorted_views.get(memory, (attribute, prefix), key_func)
 
-    def get_attr(self, item):
-        item.set_compare_attribute(self.search_attribute)
+    def get_attr(self, item, attribute):
+        item.set_compare_attribute(attribute)
         return item.get_compare_value()
     
     def get_possible_attributes(self):
         if self.model_class:
-            attributes = [attr.replace("get_", "") for attr in dir(self.model_class) if attr.startswith("get_") and attr not in ("get_compare_value", "get_compare_attribute")]
+            attributes = [attr.replace("get_", "") for attr in dir(self.model_class) if attr.startswith("get_") and attr not in ("get_compare_value", "get_compare_attribute", "get_sort_key")]
             return attributes
         else:
             messagebox.showerror("Error", "No model class found.")
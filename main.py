@@ -1,6 +1,6 @@
 from models import Customer, Ride, Restaurant
-from algorithms import quicksort, merge_sort, linear_search, binary_search_by_key
-from data_structures import DynamicArray, SinglyLinkedList, DoublyLinkedList, BinaryTree, BST
+from algorithms import quicksort, merge_sort, parallel_sort, auto_sort, multi_key, linear_search, binary_search_by_key
+from data_structures import DynamicArray, SinglyLinkedList, DoublyLinkedList, BinaryTree, BST, AVLTree
 
 from gui import Application
 
@@ -33,10 +33,10 @@ all_data = {
 }
 
 # Data structure classes to test.
-data_structure_classes = [DynamicArray, SinglyLinkedList, DoublyLinkedList, BinaryTree, BST]
+data_structure_classes = [DynamicArray, SinglyLinkedList, DoublyLinkedList, BinaryTree, BST, AVLTree]
 
 # Sorting algorithms to test.
-sorting_algorithms = [quicksort, merge_sort]
+sorting_algorithms = [quicksort, merge_sort, parallel_sort, auto_sort]
 
 # Search algorithms to test.
 search_algorithms = [linear_search, binary_search_by_key]
@@ -44,6 +44,12 @@ search_algorithms = [linear_search, binary_search_by_key]
 # Helper: Insert a list of objects into a data structure instance.
 def insert_into_structure(ds_class, objects):
     print(f"\nInserting {len(objects)} items into {ds_class.__name__} ...")
+    if hasattr(ds_class, "from_iterable"):
+        # bulk load in one go, fall back to one at a time to report the bad item
+        try:
+            return ds_class.from_iterable(objects)
+        except Exception as e:
+            print(f"  ERROR bulk loading: {e}")
     ds_instance = ds_class()
     for obj in objects:
         try:
@@ -64,15 +70,8 @@ def insert_into_structure(ds_class, objects):
 def retrieve_all(ds_instance):
     if hasattr(ds_instance, "get_all"):
         return ds_instance.get_all()
-    elif hasattr(ds_instance, "inorder"):
-        items = []
-        def inorder(node):
-            if node:
-                inorder(node.left)
-                items.append(node.data)
-                inorder(node.right)
-        inorder(ds_instance.root)
-        return items
+    elif hasattr(ds_instance, "inorder_generator"):
+        return list(ds_instance.inorder_generator())
     else:
         try:
             return list(ds_instance)
@@ -99,6 +98,8 @@ def key_ride_name(ride):
 def key_restaurant_name_search(rest):
     return rest.get_name()
 
+key_customer_tier_age_name = multi_key([("ticket_tier", True), ("age", False), ("name", False)])
+
 def run_sorting_test(ds_instance, sort_algo, key_func):
     try:
         # Retrieve items from the structure.
@@ -158,6 +159,13 @@ if __name__ == "__main__":
                     else:
                         sorted_keys = sorted_items
                     print("Sorted keys:", sorted_keys)
+
+            # Sort on several attributes at once.
+            if model_name == "Customer":
+                print("\nSorting using merge_sort by tier (descending), then age, then name:")
+                sorted_items = run_sorting_test(ds_instance, merge_sort, key_customer_tier_age_name)
+                if sorted_items is not None:
+                    print("Sorted keys:", [(x.get_ticket_tier(), x.get_age(), x.get_name()) for x in sorted_items])
             
             # Run each search algorithm on this ds.
             # For search, we choose a target from the first object's key.
@@ -194,5 +202,6 @@ if __name__ == "__main__":
 
     print("\n=== Compatibility Testing Complete ===")
 
-app = Application()
-app.tk.mainloop()
\ No newline at end of file
+    # inside the main guard, so worker processes of parallel_sort don't open a window too
+    app = Application()
+    app.tk.mainloop()
\ No newline at end of file
@@ -5,6 +5,7 @@ This code uses a python "trick", classes in python are basically dictionaries
 """
 
 class Model:
+    __slots__ = () # empty, so the compact subclasses below can go without a __dict__
     COMPARE_ATTRIBUTE = None # set this to the name of the attribute you want to compare
 
     # due to the way static members work, these methods have to be implemented in the subclasses
@@ -22,6 +23,12 @@ class Model:
             raise AttributeError(f"Attribute '{self.COMPARE_ATTRIBUTE}' not found in object.")
         return getattr(self, self.COMPARE_ATTRIBUTE)
 
+    def get_sort_key(self, attr=None):
+        """Value to sort on for an attribute, ticket_tier is turned into its rank."""
+        attr = attr or self.COMPARE_ATTRIBUTE
+        if attr == 'ticket_tier':
+            return tier_order.index(self.ticket_tier)
+        return getattr(self, attr)
 
     def compare(self, other, attr=None):
         """
@@ -217,3 +224,133 @@ class Restaurant(Model):
 
     def __str__(self):
         return f"Restaurant {self.restaurant_id}: {self.name}, {self.location}, Type: {self.type}"
+
+
+
+"""
+Compact variants of the models above. They use __slots__ instead of a per instance
+__dict__ and store ticket_tier as its rank in tier_order, worked out once when the
+object is created, so comparing by tier is an integer comparison.
+"""
+
+class CompactModel(Model):
+    __slots__ = ()
+
+    # the class to set COMPARE_ATTRIBUTE on is simply type(self) here, so these can be shared
+    def set_compare_attribute(self, attr):
+        if hasattr(self, attr):
+            type(self).COMPARE_ATTRIBUTE = attr
+        else:
+            raise AttributeError(f"Attribute '{attr}' not found in {type(self).__name__} class.")
+
+    def get_compare_attribute(self):
+        return type(self).COMPARE_ATTRIBUTE
+
+    @property
+    def ticket_tier(self):
+        return tier_order[self.tier_rank]
+
+    @ticket_tier.setter
+    def ticket_tier(self, ticket_tier):
+        self.tier_rank = tier_order.index(ticket_tier)
+
+    def get_sort_key(self, attr=None):
+        attr = attr or self.COMPARE_ATTRIBUTE
+        if attr == 'ticket_tier':
+            return self.tier_rank
+        return getattr(self, attr)
+
+    def compare(self, other, attr=None):
+        attr = attr or self.COMPARE_ATTRIBUTE
+        if attr is None:
+            raise ValueError("No attribute specified for comparison.")
+
+        self_value = self.get_sort_key(attr)
+        if isinstance(other, Model):
+            other_value = other.get_sort_key(attr)
+        elif attr == 'ticket_tier':
+            other_value = tier_order.index(other)
+        else:
+            other_value = other
+
+        if self_value < other_value:
+            return -1
+        elif self_value > other_value:
+            return 1
+        else:
+            return 0
+
+
+# The accessors of the regular models only read and write attributes,
+# so the same functions work on the slotted variants.
+
+class CompactRide(CompactModel):
+    __slots__ = ("ride_id", "name", "location", "duration", "tier_rank")
+    COMPARE_ATTRIBUTE = "ride_id"
+
+    def __init__(self, ride_id, name, location, duration, ticket_tier):
+        self.ride_id = ride_id
+        self.name = name
+        self.location = location
+        self.duration = duration
+        self.tier_rank = tier_order.index(ticket_tier)
+
+    get_ride_id = Ride.get_ride_id
+    set_ride_id = Ride.set_ride_id
+    get_name = Ride.get_name
+    set_name = Ride.set_name
+    get_location = Ride.get_location
+    set_location = Ride.set_location
+    get_duration = Ride.get_duration
+    set_duration = Ride.set_duration
+    get_ticket_tier = Ride.get_ticket_tier
+    set_ticket_tier = Ride.set_ticket_tier
+    __str__ = Ride.__str__
+
+
+class CompactCustomer(CompactModel):
+    __slots__ = ("customer_id", "name", "age", "gender", "tier_rank")
+    COMPARE_ATTRIBUTE = "customer_id"
+
+    def __init__(self, customer_id, name, age, gender, ticket_tier):
+        self.customer_id = customer_id
+        self.name = name
+        self.age = age
+        self.gender = gender
+        self.tier_rank = tier_order.index(ticket_tier)
+
+    get_customer_id = Customer.get_customer_id
+    set_customer_id = Customer.set_customer_id
+    get_name = Customer.get_name
+    set_name = Customer.set_name
+    get_age = Customer.get_age
+    set_age = Customer.set_age
+    get_gender = Customer.get_gender
+    set_gender = Customer.set_gender
+    get_ticket_tier = Customer.get_ticket_tier
+    set_ticket_tier = Customer.set_ticket_tier
+    __str__ = Customer.__str__
+
+
+class CompactRestaurant(CompactModel):
+    __slots__ = ("restaurant_id", "name", "location", "type")
+    COMPARE_ATTRIBUTE = "restaurant_id"
+
+    def __init__(self, restaurant_id, name, location, type_):
+        self.restaurant_id = restaurant_id
+        self.name = name
+        self.location = location
+        self.type = type_
+
+    get_restaurant_id = Restaurant.get_restaurant_id
+    set_restaurant_id = Restaurant.set_restaurant_id
+    get_name = Restaurant.get_name
+    set_name = Restaurant.set_name
+    get_location = Restaurant.get_location
+    set_location = Restaurant.set_location
+    get_type = Restaurant.get_type
+    set_type = Restaurant.set_type
+    __str__ = Restaurant.__str__
+
+
+COMPACT_MODELS = {Ride: CompactRide, Customer: CompactCustomer, Restaurant: CompactRestaurant}
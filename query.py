@@ -0,0 +1,150 @@
+import re
+import data_structures as ds
+import schemas
+from models import tier_order
+
+"""
+Small query engine for searching any of our containers on several attributes at once.
+
+A query is a list of conditions joined with "and" / "or" ("and" binds tighter), e.g.
+
+    age >= 20 and age <= 30 and ticket_tier in gold, platinum
+    name ^= jo or location = adventure land
+
+Operators: = (or ==), !=, <, <=, >, >=, in (comma separated values), ^= (starts with).
+Text compares case insensitively, numbers (ints and decimals) as numbers and ticket tiers
+by their rank. Ordering an int attribute by something that isn't a number is an error.
+Every condition is compiled into a plain function once, so the target values are
+parsed and normalized once per query instead of once per row.
+"""
+
+CONDITION = re.compile(r"^\s*(\w+)\s*(<=|>=|!=|==|=|<|>|\^=|\bin\b)\s*(.*?)\s*$", re.IGNORECASE)
+OR_SPLIT = re.compile(r"\s+or\s+", re.IGNORECASE)
+AND_SPLIT = re.compile(r"\s+and\s+", re.IGNORECASE)
+MISSING = object()
+
+
+def normalize_target(text):
+    """Turn a typed in value into an int or float if it looks like one, otherwise lower case text"""
+    for number in (int, float):
+        try:
+            return number(text)
+        except ValueError:
+            pass
+    return text.strip().lower()
+
+
+def is_numeric_attribute(attribute):
+    """True if attribute is an int column of any registered model"""
+    return any(column.name == attribute and column.kind == "int"
+               for columns in schemas.REGISTRY.values() for column in columns)
+
+
+def _row_converter(attribute, target):
+    """Function turning an attribute value into something comparable with target"""
+    if attribute == "ticket_tier" and isinstance(target, int):
+        return lambda value: tier_order.index(value) # only needed for ordered tier comparisons
+    if isinstance(target, (int, float)):
+        def to_number(value):
+            if type(value) in (int, float):
+                return value
+            for number in (int, float):
+                try:
+                    return number(value)
+                except (TypeError, ValueError):
+                    pass
+            return MISSING
+        return to_number
+    return lambda value: value.lower() if type(value) is str else str(value).lower()
+
+
+def compile_condition(attribute, operator, value):
+    """Compile one condition into a predicate function(item) -> bool"""
+    operator = operator.lower()
+    if operator == "in":
+        targets = [normalize_target(part) for part in value.split(",") if part.strip()]
+        if not targets:
+            raise ValueError(f"'{attribute} in' needs at least one value.")
+        convert = _row_converter(attribute, targets[0])
+        targets = set(targets)
+        test = lambda row: row in targets
+    elif operator == "^=":
+        target = value.strip().lower()
+        convert = _row_converter(attribute, target)
+        test = lambda row: row.startswith(target)
+    else:
+        target = normalize_target(value)
+        if attribute == "ticket_tier" and operator in ("<", "<=", ">", ">="):
+            if target not in tier_order:
+                raise ValueError(f"Unknown ticket tier '{value}'.")
+            target = tier_order.index(target) # ordered tier comparisons go by rank
+        elif operator in ("<", "<=", ">", ">=") and isinstance(target, str) and is_numeric_attribute(attribute):
+            raise ValueError(f"'{value}' isn't a number, {attribute} can only be compared with numbers.")
+        convert = _row_converter(attribute, target)
+        tests = {
+            "=": lambda row: row == target,
+            "==": lambda row: row == target,
+            "!=": lambda row: row != target,
+            "<": lambda row: row < target,
+            "<=": lambda row: row <= target,
+            ">": lambda row: row > target,
+            ">=": lambda row: row >= target,
+        }
+        test = tests[operator]
+
+    def predicate(item):
+        value = getattr(item, attribute, MISSING)
+        if value is MISSING:
+            return False
+        value = convert(value)
+        if value is MISSING:
+            return False
+        return test(value)
+    return predicate
+
+
+def all_of(predicates):
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda item: all(predicate(item) for predicate in predicates)
+
+
+def any_of(predicates):
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda item: any(predicate(item) for predicate in predicates)
+
+
+def compile_query(text):
+    """Compile a query string into a predicate function, raises ValueError if it can't be parsed"""
+    if not text or not text.strip():
+        raise ValueError("Empty query.")
+    alternatives = []
+    for alternative in OR_SPLIT.split(text.strip()):
+        conditions = []
+        for condition in AND_SPLIT.split(alternative):
+            match = CONDITION.match(condition)
+            if not match or not match.group(3):
+                raise ValueError(f"Can't understand '{condition}', expected something like 'age >= 20'.")
+            conditions.append(compile_condition(*match.groups()))
+        alternatives.append(all_of(conditions))
+    return any_of(alternatives)
+
+
+def search(items, query, limit=None):
+    """
+    Lazily yield the items matching query (a query string or a compiled predicate).
+    Stops as soon as limit matches have been found.
+    """
+    predicate = compile_query(query) if isinstance(query, str) else query
+    if isinstance(items, ds.BinaryTree):
+        items = items.inorder_generator()
+    if limit is not None and limit <= 0:
+        return
+    found = 0
+    for item in items:
+        if predicate(item):
+            yield item
+            found += 1
+            if found == limit:
+                return
@@ -0,0 +1,170 @@
+from operator import itemgetter
+from models import Customer, Ride, Restaurant, tier_order
+
+"""
+Registry of the CSV layout of every model: which columns it has, how each one is converted
+and what it defaults to. The loaders use it to recognise a file from its headers and to
+turn rows into objects.
+
+For every header layout a converter is built once: it knows the position of each column in
+the row (so the column order in the file doesn't matter) and how to convert it, and calls
+the constructor directly, with no per row checks of the model type.
+
+New models are added with register():
+
+    register(Show, [Column("show_id", "int"), Column("title"), Column("rating", float, default=0.0)])
+
+The CSV loaders need nothing else. The store (storage.py) and the columnar container
+(columnar.py) work out their layouts from the registered columns, the column names have to
+be the model's attribute names for that. Models with a column converted by a function
+can't be stored and are loaded from the CSV every time.
+"""
+
+TIERS = {tier: tier for tier in tier_order}
+
+
+class Column:
+    """
+    One column of a model's CSV, in the order of the constructor arguments.
+    kind is "str", "int", "tier", "rest" (this and all following values of the row as a list,
+    only for the last column) or any function taking the raw string.
+    Columns with a default are optional unless required=True: a missing header or a short
+    row then gives the default.
+    """
+    def __init__(self, name, kind="str", default=None, required=None):
+        self.name = name
+        self.kind = kind
+        self.default = default
+        self.required = default is None and kind != "rest" if required is None else required
+
+
+REGISTRY = {} # model class -> its columns, files are matched against the models in registration order
+_converters = {} # (model class, headers, factory) -> compiled converter
+
+
+def register(model_class, columns):
+    """Add (or replace) the CSV schema of a model"""
+    REGISTRY[model_class] = list(columns)
+    for key in [key for key in _converters if key[0] is model_class]:
+        del _converters[key]
+
+
+def match_headers(headers):
+    """First registered model whose required columns are all in headers, None if there is none"""
+    names = {header.strip() for header in headers}
+    for model_class, columns in REGISTRY.items():
+        if all(column.name in names for column in columns if column.required):
+            return model_class
+    return None
+
+
+def compile_converter(model_class, headers, factory=None):
+    """
+    Function turning a row of a file with these headers into factory(*values), or into a
+    tuple of the values without a factory. Built on first use and cached per layout.
+    """
+    key = (model_class, tuple(headers), factory)
+    converter = _converters.get(key)
+    if converter is None:
+        converter = _converters[key] = _compile(model_class, headers, factory)
+    return converter
+
+
+def _compile(model_class, headers, factory):
+    positions = {}
+    for position, header in enumerate(headers):
+        positions.setdefault(header.strip(), position) # the first of duplicate headers wins
+
+    fields = [] # what to take from the row for each column: a position, or a slice for "rest"
+    converters = {} # column number -> function, for the values that aren't kept as the raw string
+    optional = [] # (column number, position, default) of the optional columns, for short rows
+    row_length = 0 # rows at least this long have every column
+    for number, column in enumerate(REGISTRY[model_class]):
+        position = positions.get(column.name)
+        if column.kind == "rest":
+            # without a header of its own it takes whatever comes after the named columns
+            fields.append(slice(len(headers) if position is None else position, None))
+            continue
+        if position is None:
+            if column.required:
+                raise ValueError(f"Column '{column.name}' of {model_class.__name__} is missing.")
+            fields.append(0) # any position will do, the converter replaces the value
+            converters[number] = _constant(column.default)
+            continue
+
+        fields.append(position)
+        row_length = max(row_length, position + 1)
+        convert = _value_converter(column)
+        if convert is not None:
+            converters[number] = convert
+        if not column.required:
+            optional.append((number, position, column.default))
+
+    def plan(length):
+        # how to convert rows of this length: optional columns past the end get their default,
+        # required ones still raise IndexError
+        row_fields = list(fields)
+        row_converters = dict(converters)
+        for number, position, default in optional:
+            if position >= length:
+                row_fields[number] = 0
+                row_converters[number] = _constant(default)
+        fetch = itemgetter(*row_fields) if len(row_fields) > 1 else lambda row: (row[row_fields[0]],)
+        return fetch, sorted(row_converters.items())
+
+    fetch, steps = plan(row_length)
+    short_plans = {} # row length -> plan, made when a row that short first shows up
+
+    def convert(row):
+        if len(row) < row_length:
+            row_plan = short_plans.get(len(row))
+            if row_plan is None:
+                row_plan = short_plans[len(row)] = plan(len(row))
+            row_fetch, row_steps = row_plan
+        else:
+            row_fetch, row_steps = fetch, steps
+        values = list(row_fetch(row))
+        for number, convert_value in row_steps:
+            values[number] = convert_value(values[number])
+        return factory(*values) if factory else tuple(values)
+    return convert
+
+
+def _constant(value):
+    return lambda _: value
+
+
+def _value_converter(column):
+    """Function converting the raw string of a column, None if it is kept as it is"""
+    if callable(column.kind):
+        return column.kind
+    if column.kind == "int":
+        return int
+    if column.kind == "tier":
+        default = column.default
+        return lambda value: TIERS.get(value.lower(), default) # invalid tiers fall back to the default
+    if column.kind == "str":
+        return None
+    raise ValueError(f"Unknown column kind '{column.kind}' of column '{column.name}'.")
+
+
+register(Customer, [
+    Column("customer_id", "int"),
+    Column("name"),
+    Column("age", "int"),
+    Column("gender"),
+    Column("ticket_tier", "tier", default="bronze"),
+])
+register(Restaurant, [
+    Column("restaurant_id", "int"),
+    Column("name"),
+    Column("location"),
+    Column("type", "rest"),
+])
+register(Ride, [
+    Column("ride_id", "int"),
+    Column("name"),
+    Column("location"),
+    Column("duration"),
+    Column("ticket_tier", "tier", default="bronze", required=True),
+])
@@ -0,0 +1,406 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from itertools import chain
+import schemas
+import utils
+from models import COMPACT_MODELS, tier_order
+
+"""
+Binary on-disk format for loaded datasets, so a CSV only has to be parsed once and the
+result can be opened through mmap by any number of processes.
+
+Layout:
+    header   magic, version, model name, record count, record size, heap offset
+    records  one fixed width record per object
+    heap     utf-8 bytes of every distinct string, records point into it with (offset, length)
+
+Records are decoded only when they are read, so opening a store costs nothing no matter
+how big it is and the operating system shares the mapped pages between processes.
+"""
+
+MAGIC = b"APDS"
+VERSION = 1
+STORE_EXTENSION = ".apds"
+
+HEADER = struct.Struct("<4sHH16sQQQ") # magic, version, reserved, model name, count, record size, heap offset
+HEADER_MODEL_NAME_SIZE = 16
+ITER_BLOCK_RECORDS = 4096 # records unpacked at a time when iterating over a store
+
+# field kinds and how they are packed:
+#   int     -> q     (64-bit int)
+#   str     -> QI    (offset and length in the string heap)
+#   tier    -> b     (rank in tier_order)
+#   strlist -> QI    (the strings joined with a unit separator, stored like str)
+FIELD_FORMATS = {"int": "q", "str": "QI", "tier": "b", "strlist": "QI"}
+LIST_SEPARATOR = "\x1f"
+
+# how the column kinds of the schema registry are stored, columns converted by a function can't be
+STORE_KINDS = {"int": "int", "str": "str", "tier": "tier", "rest": "strlist"}
+
+
+def store_layout(model_class):
+    """
+    [(attribute, field kind)] of a model, worked out from its registered schema (the column
+    names are the attribute names), or None if the model can't be stored.
+    """
+    columns = schemas.REGISTRY.get(model_class)
+    name = model_class.__name__.encode("ascii", "replace")
+    if columns is None or len(name) > HEADER_MODEL_NAME_SIZE:
+        return None
+    layout = []
+    for column in columns:
+        kind = STORE_KINDS.get(column.kind) if isinstance(column.kind, str) else None
+        if kind is None:
+            return None
+        layout.append((column.name, kind))
+    return layout
+
+
+def model_by_name(name):
+    for model_class in schemas.REGISTRY:
+        if model_class.__name__ == name:
+            return model_class
+    return None
+
+
+def record_struct(layout):
+    return struct.Struct("<" + "".join(FIELD_FORMATS[kind] for _, kind in layout))
+
+
+def write_store(filename, objects, model_class=None):
+    """
+    Write model objects (a list or any of our containers) to a store file.
+    Records are streamed to disk, only the string heap is kept in memory.
+    Returns the number of records written.
+    """
+    objects = iter(objects)
+    if model_class is None:
+        first = next(objects, None)
+        if first is None:
+            raise ValueError("Can't work out the model class of an empty dataset.")
+        model_class = type(first)
+        objects = chain([first], objects)
+    for regular_class, compact_class in COMPACT_MODELS.items():
+        if model_class is compact_class:
+            model_class = regular_class # compact objects are stored in the same format
+    layout = store_layout(model_class)
+    if layout is None:
+        raise ValueError(f"No store layout for {model_class.__name__}.")
+    record = record_struct(layout)
+    heap = bytearray()
+    heap_positions = {} # string -> (offset, length), so repeated strings are stored once
+    count = 0
+
+    def heap_ref(text):
+        position = heap_positions.get(text)
+        if position is None:
+            encoded = text.encode("utf-8")
+            position = (len(heap), len(encoded))
+            heap.extend(encoded)
+            heap_positions[text] = position
+        return position
+
+    with open(filename, "wb") as file:
+        file.write(b"\0" * HEADER.size) # real header is written at the end, once the count is known
+        for obj in objects:
+            values = []
+            for name, kind in layout:
+                value = getattr(obj, name)
+                if kind == "int":
+                    values.append(int(value))
+                elif kind == "tier":
+                    values.append(tier_order.index(value))
+                elif kind == "strlist":
+                    values.extend(heap_ref(LIST_SEPARATOR.join(value)))
+                else:
+                    values.extend(heap_ref(str(value)))
+            file.write(record.pack(*values))
+            count += 1
+
+        heap_offset = HEADER.size + count * record.size
+        file.write(heap)
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, 0, model_class.__name__.encode("ascii"), count, record.size, heap_offset))
+    return count
+
+
+class MappedStore:
+    """
+    Read only, memory mapped view of a store file. Behaves like our other containers
+    (len, indexing, iteration, get_all), each record is decoded when it is accessed.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, _, model_name, self.count, record_size, self.heap_offset = HEADER.unpack_from(self.map, 0)
+        except (ValueError, struct.error):
+            self.file.close()
+            raise ValueError(f"'{filename}' is not a dataset store.")
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"'{filename}' is not a dataset store (or was written by another version).")
+        self.model_class = model_by_name(model_name.rstrip(b"\0").decode("ascii", "replace"))
+        if self.model_class is None:
+            self.close()
+            raise ValueError(f"Unknown model type in '{filename}'.")
+
+        self.layout = store_layout(self.model_class)
+        if self.layout is None:
+            self.close()
+            raise ValueError(f"No store layout for {self.model_class.__name__}.")
+        self.record = record_struct(self.layout)
+        if self.record.size != record_size:
+            self.close()
+            raise ValueError(f"Record size in '{filename}' doesn't match the {self.model_class.__name__} layout.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        try:
+            if getattr(self, "map", None) is not None:
+                self.map.close()
+                self.map = None
+        finally:
+            self.file.close()
+
+    def __len__(self):
+        return self.count
+
+    def get_size(self):
+        return self.count
+
+    def __getitem__(self, index):
+        """Decode the record at index, returns None if out of bounds."""
+        if index < 0:
+            index += self.count
+        if 0 <= index < self.count:
+            return self._read(index)
+        return None
+
+    def __iter__(self):
+        # bulk path: unpack the records a block at a time and decode every distinct string only once
+        # (equal strings share one heap position), so a full scan is much cheaper than count _read calls.
+        # The blocks are copies: a view on the map held across the yield would keep it from being closed.
+        strings = {}
+        end = HEADER.size + self.count * self.record.size
+        step = ITER_BLOCK_RECORDS * self.record.size
+        for start in range(HEADER.size, end, step):
+            for raw in self.record.iter_unpack(self.map[start:min(start + step, end)]):
+                values = []
+                position = 0
+                for _, kind in self.layout:
+                    if kind == "int":
+                        values.append(raw[position])
+                        position += 1
+                    elif kind == "tier":
+                        values.append(tier_order[raw[position]])
+                        position += 1
+                    else:
+                        reference = raw[position:position + 2] # (offset, length): an empty string shares its offset with the next one
+                        text = strings.get(reference)
+                        if text is None:
+                            text = strings[reference] = self._read_string(*reference)
+                        if kind == "strlist":
+                            values.append(text.split(LIST_SEPARATOR) if text else [])
+                        else:
+                            values.append(text)
+                        position += 2
+                yield self.model_class(*values)
+
+    def get_all(self):
+        return list(self)
+
+    def _read_string(self, offset, length):
+        start = self.heap_offset + offset
+        return self.map[start:start + length].decode("utf-8")
+
+    def _read(self, index):
+        raw = self.record.unpack_from(self.map, HEADER.size + index * self.record.size)
+        values = []
+        position = 0
+        for _, kind in self.layout:
+            if kind == "int":
+                values.append(raw[position])
+                position += 1
+            elif kind == "tier":
+                values.append(tier_order[raw[position]])
+                position += 1
+            else:
+                text = self._read_string(raw[position], raw[position + 1])
+                if kind == "strlist":
+                    values.append(text.split(LIST_SEPARATOR) if text else [])
+                else:
+                    values.append(text)
+                position += 2
+        return self.model_class(*values)
+
+
+def csv_to_store(csv_filename, store_filename=None):
+    """Parse a CSV once and save it as a store next to it, returns the store's filename"""
+    headers, data = utils.import_csv(csv_filename)
+    if headers is None or data is None:
+        return None
+    objects = utils.data_to_objects(data, headers)
+    if not objects:
+        return None
+    store_filename = store_filename or csv_filename.rsplit(".", 1)[0] + STORE_EXTENSION
+    write_store(store_filename, objects)
+    return store_filename
+
+
+SNAPSHOT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "apds_snapshots")
+SNAPSHOT_CACHE_MAX_BYTES = 512 * 1024 * 1024 # least recently used snapshots are evicted above this
+
+
+class SnapshotCache:
+    """
+    Keeps a store (see write_store) of every imported CSV in a cache directory, so loading
+    an unchanged file again skips the CSV parsing. A snapshot is only used if the CSV still
+    has the same size, mtime and header line; any other snapshot of that CSV is stale and
+    is deleted. The directory is kept under max_bytes by dropping the least recently used.
+    """
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory or SNAPSHOT_DIR
+        self.max_bytes = SNAPSHOT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    def _source_prefix(self, csv_filename):
+        return hashlib.sha1(os.path.abspath(csv_filename).encode("utf-8")).hexdigest()[:16]
+
+    def snapshot_path(self, csv_filename):
+        """Where the snapshot of the current version of csv_filename lives, None if it can't be read"""
+        try:
+            stat = os.stat(csv_filename)
+            with open(csv_filename, "rb") as file:
+                header = file.readline()
+        except OSError:
+            return None
+        version = hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}:".encode("ascii") + header).hexdigest()[:16]
+        return os.path.join(self.directory, f"{self._source_prefix(csv_filename)}-{version}{STORE_EXTENSION}")
+
+    def open(self, csv_filename):
+        """MappedStore of the snapshot of csv_filename, or None if there's no valid one"""
+        path = self.snapshot_path(csv_filename)
+        if path is None or not os.path.exists(path):
+            self.remove_stale(csv_filename, keep=None)
+            return None
+        try:
+            store = MappedStore(path)
+        except ValueError:
+            os.remove(path) # damaged or from another version of the format
+            return None
+        os.utime(path) # mark as recently used for eviction
+        return store
+
+    def save(self, csv_filename, objects, model_class):
+        """
+        Write objects (any iterable, it's only walked once) as the snapshot of csv_filename.
+        Returns the number of objects written.
+        """
+        path = self.snapshot_path(csv_filename)
+        os.makedirs(self.directory, exist_ok=True)
+        # write to a temporary name first, so a half written snapshot can never be picked up
+        handle, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        os.close(handle)
+        try:
+            count = write_store(temp_path, objects, model_class)
+            if path is None:
+                os.remove(temp_path)
+                return count
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.remove_stale(csv_filename, keep=path)
+        self.evict(keep=path)
+        return count
+
+    def remove_stale(self, csv_filename, keep):
+        """Delete all snapshots of csv_filename except keep"""
+        if not os.path.isdir(self.directory):
+            return
+        prefix = self._source_prefix(csv_filename) + "-"
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(prefix) and path != keep:
+                os.remove(path)
+
+    def evict(self, keep=None):
+        """Drop least recently used snapshots until the cache fits in max_bytes"""
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if name.endswith(STORE_EXTENSION):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                snapshots.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in snapshots)
+        for _, size, path in sorted(snapshots): # oldest first
+            if total <= self.max_bytes:
+                return
+            if path != keep:
+                os.remove(path)
+                total -= size
+        if total > self.max_bytes and keep is not None:
+            os.remove(keep) # doesn't fit even on its own
+
+
+def load_csv_cached(csv_filename, ds, cache, batch_size=None, progress=None):
+    """
+    Same as utils.load_csv_into_ds, but loads from the snapshot in cache when the CSV hasn't
+    changed, and writes one while parsing when it has (or has never been loaded).
+    Models without a store layout are loaded straight from the CSV every time.
+    Returns the model class and the number of objects loaded, or None, 0 on failure.
+    """
+    batch_size = batch_size or utils.LOAD_BATCH_SIZE
+    store = cache.open(csv_filename)
+    if store is not None:
+        with store:
+            batches = utils.batched(store, batch_size)
+            try:
+                return store.model_class, utils.insert_batches(ds, batches, progress)
+            finally:
+                batches.close() # done with the records before the store is closed, also when stopped early
+
+    model_class, batches = utils.iter_object_batches(csv_filename, batch_size)
+    if model_class is None:
+        return None, 0
+    if store_layout(model_class) is None: # models the store can't hold are loaded without a snapshot
+        return model_class, utils.insert_batches(ds, batches, progress)
+    loaded = 0
+    def fill_ds():
+        # the batches go into the container and, as they pass, into the snapshot
+        nonlocal loaded
+        for batch in utils.feed_batches(ds, batches):
+            loaded += len(batch)
+            if progress:
+                progress(loaded)
+            yield from batch
+
+    objects = fill_ds()
+    try:
+        cache.save(csv_filename, objects, model_class)
+    except OSError as e:
+        print(f"Warning: no snapshot written for '{csv_filename}': {e}")
+        for _ in objects: # finish loading without one
+            pass
+    return model_class, loaded
+
+
+# Example Usage: python storage.py customers.csv rides.csv
+if __name__ == "__main__":
+    for csv_filename in sys.argv[1:]:
+        store_filename = csv_to_store(csv_filename)
+        if store_filename:
+            with MappedStore(store_filename) as store:
+                print(f"{csv_filename} -> {store_filename} ({len(store)} records)")
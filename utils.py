@@ -1,5 +1,15 @@
 import csv
-from models import Customer, Restaurant, Ride
+import heapq
+import io
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from algorithms import merge_sort, POOL_CONTEXT
+import schemas
+from models import COMPACT_MODELS
 from data_structures import DynamicArray, SinglyLinkedList, DoublyLinkedList, BinaryTree, BST
 
 tier_order = ['bronze', 'silver', 'gold', 'platinum']  # Adding new items in ascending order
@@ -23,56 +33,334 @@ def import_csv(filename):
 
 
 def match_headers(headers):
-    """Determine the model class based on CSV headers"""
-    if 'customer_id' in headers and 'name' in headers and 'age' in headers and 'gender' in headers:
-        return Customer
-    elif 'restaurant_id' in headers and 'name' in headers and 'location' in headers:
-        return Restaurant
-    elif 'ride_id' in headers and 'name' in headers and 'location' in headers and 'duration' in headers and 'ticket_tier' in headers:
-        return Ride
-    else:
+    """Determine the model class based on CSV headers (see schemas for the known layouts)"""
+    model_class = schemas.match_headers(headers)
+    if model_class is None:
         print("Error: Unknown CSV format.")
-        return None
+    return model_class
+
 
+def data_to_objects(data, headers, compact=False):
+    """
+    Convert CSV data to objects based on the headers.
+    With compact=True the slotted Compact variants of the models are created instead.
+    """
+    return list(iter_objects(data, headers, compact))
 
-def data_to_objects(data, headers):
-    """Convert CSV data to objects based on the headers"""
+
+def iter_objects(rows, headers, compact=False):
+    """Lazily convert CSV rows (any iterable, e.g. from stream_csv) to objects based on the headers"""
     model_class = match_headers(headers)
     if not model_class:
-        return []
+        return
+    target_class = COMPACT_MODELS.get(model_class, model_class) if compact else model_class
+    # blank lines come out of the csv reader as empty rows and are skipped, same as _read_byte_range
+    yield from map(schemas.compile_converter(model_class, headers, target_class), filter(None, rows))
+
+
+def stream_csv(filename):
+    """
+    Open a CSV for streaming: returns headers and a lazy iterator over the rows,
+    which closes the file once it is used up. Returns None, None if it can't be read.
+    """
+    try:
+        file = open(filename, 'r', newline='')
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        return None, None
+    csv_reader = csv.reader(file)
+    headers = next(csv_reader, None)
+    if headers is None:
+        file.close()
+        return None, None
+    return headers, _rows_then_close(csv_reader, file)
+
+
+def _rows_then_close(csv_reader, file):
+    with file:
+        yield from csv_reader
+
+
+LOAD_BATCH_SIZE = 10000 # objects handed to the container at once when streaming a file in
+PARALLEL_IMPORT_THRESHOLD = 16 * 1024 * 1024 # bytes, smaller files are parsed faster by one process
+PARALLEL_IMPORT_RANGE_BYTES = 4 * 1024 * 1024 # size of the byte range one worker parses at a time
+PARALLEL_IMPORT_WORKERS = None # None means one worker per cpu core
+
+
+def iter_object_batches(filename, batch_size=None, compact=False, workers=None):
+    """
+    Returns the model class of a CSV and a lazy iterator over lists of its objects, in file
+    order, or None, None if the file can't be read. Big files (PARALLEL_IMPORT_THRESHOLD and
+    up) are split into byte ranges that are parsed by worker processes, then one batch is
+    one range, otherwise the rows are parsed here in batches of batch_size.
+    """
+    batch_size = batch_size or LOAD_BATCH_SIZE
+    workers = workers or PARALLEL_IMPORT_WORKERS or os.cpu_count() or 1
+    headers, rows = stream_csv(filename)
+    if headers is None:
+        return None, None
+    model_class = match_headers(headers)
+    if not model_class:
+        rows.close()
+        return None, None
+
+    if workers > 1 and os.path.getsize(filename) >= PARALLEL_IMPORT_THRESHOLD:
+        rows.close()
+        target_class = COMPACT_MODELS.get(model_class, model_class) if compact else model_class
+        with open(filename, 'rb') as file:
+            file.readline() # the header line, already parsed above
+            data_start = file.tell()
+        return model_class, _range_batches(filename, data_start, None, headers, model_class, target_class, workers)
+    return model_class, batched(iter_objects(rows, headers, compact), batch_size)
 
+
+def batched(objects, batch_size):
+    """Lazily cut an iterable into lists of batch_size items"""
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def split_byte_ranges(filename, start, parts, end=None):
+    """
+    Split a file from byte start to end (default: its end) into about parts (start, end)
+    ranges that all begin at the start of a line. Assumes quoted fields don't contain newlines.
+    """
+    size = os.path.getsize(filename) if end is None else end
+    bounds = [start]
+    with open(filename, 'rb') as file:
+        for i in range(1, parts):
+            position = start + (size - start) * i // parts
+            file.seek(max(position - 1, bounds[-1]))
+            file.readline() # skip to the start of the next line (stays put if position already is one)
+            position = file.tell()
+            if position >= size:
+                break
+            if position > bounds[-1]:
+                bounds.append(position)
+    bounds.append(size)
+    return [(low, high) for low, high in zip(bounds, bounds[1:]) if high > low]
+
+
+def _range_batches(filename, start, end, headers, model_class, target_class, workers):
+    """One batch of objects per byte range of the file between start and end, in file order"""
+    end = os.path.getsize(filename) if end is None else end
+    parts = max(workers, (end - start) // PARALLEL_IMPORT_RANGE_BYTES)
+    ranges = split_byte_ranges(filename, start, parts, end)
+    if workers <= 1:
+        convert = schemas.compile_converter(model_class, headers, target_class)
+        for low, high in ranges:
+            yield list(map(convert, _read_byte_range(filename, low, high)))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=POOL_CONTEXT) as pool:
+        pending = deque()
+        for low, high in ranges:
+            pending.append(pool.submit(_parse_byte_range, filename, low, high, headers, model_class))
+            if len(pending) >= 2 * workers: # don't parse too far ahead of whoever consumes the batches
+                yield [target_class(*values) for values in pending.popleft().result()]
+        while pending:
+            yield [target_class(*values) for values in pending.popleft().result()]
+
+
+def _read_byte_range(filename, start, end):
+    """CSV rows of one byte range of the file"""
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode('utf-8')
+    # blank lines are skipped, same as iter_objects (an appended tail can also start with the newline ending the old last row)
+    return [row for row in csv.reader(io.StringIO(text, newline='')) if row]
+
+
+def _parse_byte_range(filename, start, end, headers, model_class):
+    """
+    Runs in a worker process: parse and type convert one byte range of the file.
+    Plain tuples are sent back instead of objects, they pickle several times faster.
+    """
+    return list(map(schemas.compile_converter(model_class, headers), _read_byte_range(filename, start, end)))
+
+
+def parallel_import_csv(filename, workers=None, compact=False):
+    """
+    Parallel counterpart of import_csv + data_to_objects: returns the model class and all
+    objects of the file in file order, or None, None if it can't be read.
+    """
+    model_class, batches = iter_object_batches(filename, compact=compact, workers=workers)
+    if model_class is None:
+        return None, None
     objects = []
+    for batch in batches:
+        objects.extend(batch)
+    return model_class, objects
+
+
+def load_csv_into_ds(filename, ds, batch_size=None, progress=None, compact=False, workers=None):
+    """
+    Stream a CSV straight into a data structure: rows -> objects -> container, one batch at
+    a time. Nothing is read ahead of the batch being inserted (the generators only produce
+    what the next step asks for), so apart from the container only one batch is in memory.
+    Big files are parsed by worker processes, see iter_object_batches.
+    progress(rows_loaded) is called after every batch.
+    Returns the model class and the number of objects loaded, or None, 0 on failure.
+    """
+    model_class, batches = iter_object_batches(filename, batch_size, compact, workers)
+    if model_class is None:
+        return None, 0
+    return model_class, insert_batches(ds, batches, progress)
+
+
+def insert_batches(ds, batches, progress=None):
+    """Insert lists of objects into ds one after another, returns how many were inserted"""
+    loaded = 0
+    for batch in feed_batches(ds, batches):
+        loaded += len(batch)
+        if progress:
+            progress(loaded)
+    return loaded
+
+
+def feed_batches(ds, batches):
+    """
+    Insert batches into ds as they pass through, yielding each one after it went in.
+    BST.extend rebuilds the whole tree, so BSTs (and AVL trees) get everything in one
+    extend once the last batch has passed, instead of one rebuild per batch.
+    """
+    if not isinstance(ds, BST):
+        for batch in batches:
+            insert_into_ds(ds, batch)
+            yield batch
+        return
+    pending = []
+    for batch in batches:
+        pending.extend(batch)
+        yield batch
+    insert_into_ds(ds, pending)
+
+
+INCREMENTAL_CHECK_BYTES = 64 # bytes before the cursor that have to be unchanged for an append to be trusted
+
+
+class ImportCursor:
+    """
+    How far a CSV has been loaded: the byte offset just past the last row consumed and the
+    number of rows. It also keeps the header line and the bytes right before the offset,
+    so load_appended can tell a file that only grew from one that was truncated or rewritten.
+    Rows are assumed to be one line each (no newlines inside quoted fields).
+    """
+    def __init__(self, filename, model_class, header, offset, rows, tail):
+        self.filename = filename
+        self.model_class = model_class
+        self.header = header
+        self.offset = offset
+        self.rows = rows
+        self.tail = tail
+
+    @classmethod
+    def after_rows(cls, filename, rows):
+        """
+        Cursor for a file of which the first rows data rows have been loaded (by any of the
+        full loaders), or None if the file doesn't have that many rows (anymore).
+        """
+        try:
+            file = open(filename, 'rb')
+        except OSError:
+            return None
+        with file:
+            header = file.readline()
+            model_class = match_headers(_parse_header_line(header))
+            if not model_class:
+                return None
+            offset = file.tell()
+            remaining = rows
+            while remaining:
+                line = file.readline()
+                if not line:
+                    return None # fewer rows than were loaded
+                offset += len(line)
+                if line.strip(b"\r\n"): # blank lines aren't rows, the loaders skip them
+                    remaining -= 1
+            # a last row without a newline after it was loaded too, so the cursor sits at the end of the file
+            return cls(filename, model_class, header, offset, rows, _bytes_before(file, offset))
+
+    def matches_file(self):
+        """True if the file still holds everything up to offset, unchanged as far as we can tell"""
+        try:
+            file = open(self.filename, 'rb')
+        except OSError:
+            return False
+        with file:
+            size = os.fstat(file.fileno()).st_size
+            if size < self.offset or file.readline() != self.header:
+                return False # truncated or a different header
+            if _bytes_before(file, self.offset) != self.tail:
+                return False # rewritten
+            if size > self.offset and not self.tail.endswith(b"\n"):
+                # the last row we loaded had no newline yet, the appended part has to start a new line
+                file.seek(self.offset)
+                return file.read(1) in (b"\n", b"\r")
+            return True
+
+
+def _parse_header_line(header):
+    return next(csv.reader([header.decode('utf-8')]), [])
+
+
+def _last_line_end(file, start, end):
+    """Position just past the last newline between start and end, start if there is none"""
+    position = end
+    while position > start:
+        block_start = max(position - 64 * 1024, start)
+        file.seek(block_start)
+        newline = file.read(position - block_start).rfind(b"\n")
+        if newline != -1:
+            return block_start + newline + 1
+        position = block_start
+    return start
+
+
+def _bytes_before(file, offset):
+    start = max(offset - INCREMENTAL_CHECK_BYTES, 0)
+    file.seek(start)
+    return file.read(offset - start)
+
+
+def load_appended(cursor, ds, progress=None, compact=False, workers=None):
+    """
+    Incremental reload: parse only the rows added to the file since cursor and append them
+    to ds (containers keep their indexes up to date as items are added).
+    Returns the new cursor and the number of rows added, or None, 0 if the file was
+    truncated or rewritten, then it needs a full reload.
+    """
+    if not cursor.matches_file():
+        return None, 0
+    # only whole lines are taken, a row the writer is still in the middle of is left for the next call
+    with open(cursor.filename, 'rb') as file:
+        end = _last_line_end(file, cursor.offset, os.fstat(file.fileno()).st_size)
+    if end == cursor.offset:
+        return cursor, 0
+    workers = workers or PARALLEL_IMPORT_WORKERS or os.cpu_count() or 1
+    if end - cursor.offset < PARALLEL_IMPORT_THRESHOLD:
+        workers = 1
+    target_class = COMPACT_MODELS.get(cursor.model_class, cursor.model_class) if compact else cursor.model_class
+    headers = _parse_header_line(cursor.header)
+    batches = _range_batches(cursor.filename, cursor.offset, end, headers, cursor.model_class, target_class, workers)
+    loaded = insert_batches(ds, batches, progress)
+
+    with open(cursor.filename, 'rb') as file:
+        tail = _bytes_before(file, end)
+    return ImportCursor(cursor.filename, cursor.model_class, cursor.header, end, cursor.rows + loaded, tail), loaded
 
-    for row in data:
-        # Map row data to the appropriate object attributes
-        if model_class == Customer:
-            customer_id, name, age, gender = row[0], row[1], int(row[2]), row[3]
-            ticket_tier = row[4].lower() if len(row) > 4 else 'bronze'  # default to 'bronze' if not found
-            if ticket_tier not in tier_order:
-                ticket_tier = 'bronze'  # Ensure ticket_tier is valid
-            customer = Customer(int(customer_id), name, age, gender, ticket_tier)
-            objects.append(customer)
-
-        elif model_class == Restaurant:
-            restaurant_id, name, location = row[0], row[1], row[2]
-            type_ = row[3:] if len(row) > 3 else []  # Default to empty if no type is provided
-            restaurant = Restaurant(int(restaurant_id), name, location, type_)
-            objects.append(restaurant)
-
-        elif model_class == Ride:
-            ride_id, name, location, duration, ticket_tier = row[0], row[1], row[2], row[3], row[4].lower()
-            if ticket_tier not in tier_order:
-                ticket_tier = 'bronze'  # Default to 'bronze' if not valid
-            ride = Ride(int(ride_id), name, location, duration, ticket_tier)
-            objects.append(ride)
-
-    return objects
 
 def insert_into_ds(ds, objects):
     if not objects:
         return ds
     
-    if hasattr(ds, "insert"):
+    if hasattr(ds, "extend"): # bulk load when the structure supports it
+        ds.extend(objects)
+    elif hasattr(ds, "insert"):
         for obj in objects:
             ds.insert(obj)
     elif hasattr(ds, "add"):
@@ -83,6 +371,155 @@ def insert_into_ds(ds, objects):
     return ds
 
 
+EXTERNAL_SORT_CHUNK_ROWS = 100000 # rows held in memory at once, the memory knob of sort_csv
+EXTERNAL_SORT_MAX_FANIN = 64 # runs merged at once, so we never hold too many files open
+
+
+def csv_sort_key(column_name, index):
+    """
+    Key function for a CSV row on one column. Tiers sort by rank (invalid ones count as
+    bronze, same as data_to_objects), numbers before text and as numbers.
+    """
+    if column_name == 'ticket_tier':
+        def tier_key(row):
+            tier = row[index].lower() if len(row) > index else 'bronze'
+            return tier_order.index(tier) if tier in tier_order else 0
+        return tier_key
+
+    def value_key(row):
+        value = row[index] if len(row) > index else ''
+        try:
+            return (0, int(value), '')
+        except ValueError:
+            return (1, 0, value) # tuples keep ints and text comparable with each other
+    return value_key
+
+
+def sort_csv(filename, column_name, output_filename=None, chunk_rows=None):
+    """
+    External merge sort of a CSV by one column, for files bigger than memory.
+    The file is read in chunks of chunk_rows rows, each chunk is sorted and spilled to a
+    temporary file (a run), then the runs are k-way merged. The sort is stable.
+    Writes the sorted CSV to output_filename and returns it, or without output_filename
+    returns headers and a lazy MergedRows iterator over the rows (close it, or use it in a
+    with block, if it isn't read to the end). Returns None if the file can't be sorted.
+    """
+    chunk_rows = chunk_rows or EXTERNAL_SORT_CHUNK_ROWS
+    try:
+        file = open(filename, 'r', newline='')
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found.")
+        return None
+
+    with file:
+        csv_reader = csv.reader(file)
+        headers = next(csv_reader, None)
+        if not headers or not match_headers(headers):
+            return None
+        if column_name not in headers:
+            print(f"Error: Column '{column_name}' not found in '{filename}'.")
+            return None
+        key_func = csv_sort_key(column_name, headers.index(column_name))
+
+        temp_dir = tempfile.mkdtemp(prefix="sort_csv_")
+        try:
+            runs = []
+            chunk = []
+            for row in csv_reader:
+                chunk.append(row)
+                if len(chunk) >= chunk_rows:
+                    runs.append(_write_run(temp_dir, len(runs), merge_sort(chunk, key_func)))
+                    chunk = []
+            if chunk or not runs:
+                runs.append(_write_run(temp_dir, len(runs), merge_sort(chunk, key_func)))
+        except BaseException:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+
+    try:
+        # merge in rounds if there are more runs than we want to keep open at once
+        round_number = 0
+        while len(runs) > EXTERNAL_SORT_MAX_FANIN:
+            merged_runs = []
+            for start in range(0, len(runs), EXTERNAL_SORT_MAX_FANIN):
+                group = runs[start:start + EXTERNAL_SORT_MAX_FANIN]
+                rows = _merge_runs(group, key_func)
+                merged_runs.append(_write_run(temp_dir, f"{round_number}_{start}", rows))
+                for run in group:
+                    os.remove(run)
+            runs = merged_runs
+            round_number += 1
+    except BaseException:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+
+    if output_filename is None:
+        return headers, MergedRows(runs, key_func, temp_dir)
+
+    try:
+        with open(output_filename, 'w', newline='') as output:
+            csv_writer = csv.writer(output)
+            csv_writer.writerow(headers)
+            csv_writer.writerows(_merge_runs(runs, key_func))
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return output_filename
+
+
+def _write_run(temp_dir, name, rows):
+    path = os.path.join(temp_dir, f"run_{name}.csv")
+    with open(path, 'w', newline='') as run_file:
+        csv.writer(run_file).writerows(rows)
+    return path
+
+
+def _merge_runs(runs, key_func):
+    """Lazily k-way merge sorted run files, earlier runs win ties so the result stays stable"""
+    files = [open(run, 'r', newline='') for run in runs]
+    try:
+        yield from heapq.merge(*(csv.reader(run_file) for run_file in files), key=key_func)
+    finally:
+        for run_file in files:
+            run_file.close()
+
+
+class MergedRows:
+    """
+    Iterator over the sorted rows of sort_csv, it owns the temporary run files. They are
+    removed once all rows were read, on close() (or at the end of a with block), or at the
+    latest when the iterator is garbage collected, also if it was never started.
+    """
+    def __init__(self, runs, key_func, temp_dir):
+        self.rows = _merge_runs(runs, key_func)
+        self.temp_dir = temp_dir
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.rows)
+        except StopIteration:
+            self.close()
+            raise
+
+    def close(self):
+        if self.temp_dir is not None:
+            self.rows.close() # closes the open run files
+            self.rows = iter(())
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+            self.temp_dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+
 def print_data(filename):
     """Load CSV and print the corresponding objects"""
     headers, data = import_csv(filename)